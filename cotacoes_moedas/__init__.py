@@ -1,8 +1,16 @@
-from .bcb_ptax import PtaxQuote, fetch_chf_ptax, fetch_dolar_ptax, fetch_euro_ptax
+from .bcb_ptax import (
+    PtaxQuote,
+    fetch_all_ptax,
+    fetch_chf_ptax,
+    fetch_dolar_ptax,
+    fetch_euro_ptax,
+    fetch_ptax_multi,
+)
 from .investing import Quote, fetch_usd_brl
 from .juros import (
     InterestRateQuote,
     calculate_cdi_daily_percent,
+    calculate_cdi_daily_percent_fast,
     fetch_selic,
     fetch_tjlp,
 )
@@ -16,8 +24,9 @@ from .storage import (
     update_xlsx_log,
     update_xlsx_quotes_and_log,
     update_xlsx_usd_brl,
+    xlsx_session,
 )
-from .valor_globo import BidAskQuote, fetch_dolar_turismo
+from .valor_globo import BidAskQuote, fetch_dolar_turismo, fetch_dolar_turismo_cached
 
 __all__ = [
     "BidAskQuote",
@@ -25,10 +34,14 @@ __all__ = [
     "PtaxQuote",
     "Quote",
     "calculate_cdi_daily_percent",
+    "calculate_cdi_daily_percent_fast",
+    "fetch_all_ptax",
+    "fetch_ptax_multi",
     "fetch_dolar_ptax",
     "fetch_euro_ptax",
     "fetch_chf_ptax",
     "fetch_dolar_turismo",
+    "fetch_dolar_turismo_cached",
     "fetch_selic",
     "fetch_tjlp",
     "fetch_usd_brl",
@@ -41,4 +54,5 @@ __all__ = [
     "update_xlsx_quotes_and_log",
     "update_csv_from_xlsx",
     "normalize_xlsx_layout",
+    "xlsx_session",
 ]
@@ -1,28 +1,76 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
+from http.client import HTTPException
 import re
 import time
 
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
-from .parsing import ParseDecimalError, parse_pt_br_decimal
+from .bcb_ptax_http import (
+    PTAX_CHF_CODE,
+    PTAX_EUR_CODE,
+    PTAX_USD_CODE,
+    fetch_ptax_boletim_html,
+)
+from .parsing import (
+    ParseDecimalError,
+    html_table_rows,
+    is_br_date,
+    parse_pt_br_decimal,
+)
 from .page_consistency import (
     PageCheck,
     PageConsistencyError,
+    count_selectors,
     describe_page,
     ensure_page_consistency,
 )
-from .playwright_utils import chromium_page, proxy_from_env
+from .playwright_utils import (
+    DEFAULT_RETRY_COUNT,
+    NAVIGATION_TIMEOUT_MS,
+    OVERALL_TIMEOUT_MS,
+    SELECTOR_TIMEOUT_MS,
+    chromium_page,
+    close_shared_browser,
+    deadline_after,
+    proxy_from_env,
+    remaining_timeout_ms,
+    resolve_overall_timeout_ms,
+    retry_on_timeout,
+)
 
 
 BCB_HISTORICO_URL = "https://www.bcb.gov.br/estabilidadefinanceira/historicocotacoes"
 PTAX_USD_LABEL = "DOLAR DOS EUA"
 PTAX_EUR_LABEL = "EURO"
 PTAX_CHF_LABEL = "FRANCO SUICO"
+_PTAX_CURRENCIES = (
+    ("ptax_usd", PTAX_USD_LABEL, "USD/BRL PTAX"),
+    ("ptax_eur", PTAX_EUR_LABEL, "EUR/BRL PTAX"),
+    ("ptax_chf", PTAX_CHF_LABEL, "CHF/BRL PTAX"),
+)
+_PTAX_CURRENCY_CODES = {
+    PTAX_USD_LABEL: PTAX_USD_CODE,
+    PTAX_EUR_LABEL: PTAX_EUR_CODE,
+    PTAX_CHF_LABEL: PTAX_CHF_CODE,
+}
+_PTAX_FORM_FIELDS = (
+    ('input[name="RadOpcao"][value="1"]', "opcao de periodo"),
+    ('input[name="DATAINI"]', "campo DATAINI"),
+    ('input[name="DATAFIM"]', "campo DATAFIM"),
+    ('select[name="ChkMoeda"]', "combo de moeda"),
+    ('input[type="submit"]', "botao de consulta"),
+)
+# Usado so no filtro do Playwright; no Python a checagem e `is_br_date`.
 _DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+_PTAX_ROWS_SCRIPT = (
+    "rows => rows.map(row => Array.from(row.querySelectorAll('td'))"
+    ".slice(0, 4).map(cell => (cell.innerText || '').trim()))"
+)
 
 
 class PriceParseError(RuntimeError):
@@ -48,29 +96,59 @@ def _parse_ptax_date(value: str) -> date:
 
 
 def _extract_ptax_rows(frame) -> list[tuple[date, str, str, str]]:
+    # Uma unica chamada ao navegador devolve o texto das 4 primeiras celulas
+    # de cada linha (evita um round-trip por celula).
+    raw_rows = frame.locator("tr").evaluate_all(_PTAX_ROWS_SCRIPT)
     rows: list[tuple[date, str, str, str]] = []
-    row_locator = frame.locator("tr")
-    for index in range(row_locator.count()):
-        cells = row_locator.nth(index).locator("td")
-        if cells.count() < 4:
+    for cells in raw_rows:
+        if len(cells) < 4:
             continue
-        date_text = cells.nth(0).inner_text().strip()
-        if not _DATE_PATTERN.match(date_text):
+        date_text = cells[0]
+        if not is_br_date(date_text):
             continue
-        buy_raw = cells.nth(2).inner_text().strip()
-        sell_raw = cells.nth(3).inner_text().strip()
+        buy_raw = cells[2]
+        sell_raw = cells[3]
         rows.append((_parse_ptax_date(date_text), date_text, buy_raw, sell_raw))
     return rows
 
 
+def _extract_ptax_rows_html(html: str) -> list[tuple[date, str, str, str]]:
+    rows: list[tuple[date, str, str, str]] = []
+    for cells in html_table_rows(html):
+        if len(cells) < 4 or not is_br_date(cells[0]):
+            continue
+        rows.append((_parse_ptax_date(cells[0]), cells[0], cells[2], cells[3]))
+    return rows
+
+
+def _response_html(response) -> str:
+    try:
+        body = response.body()
+    except Exception:
+        return ""
+    content_type = (response.headers or {}).get("content-type", "")
+    charset = "latin-1"
+    if "charset=" in content_type:
+        charset = content_type.split("charset=", 1)[1].split(";", 1)[0].strip()
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("latin-1")
+
+
 def _load_ptax_rows(frame, timeout_ms: int) -> list[tuple[date, str, str, str]]:
-    deadline = time.monotonic() + (timeout_ms / 1000)
-    while time.monotonic() < deadline:
-        rows = _extract_ptax_rows(frame)
-        if rows:
-            return rows
-        time.sleep(0.5)
-    raise PriceParseError("timeout ao carregar tabela PTAX")
+    # Espera (no navegador) a primeira celula com data antes de ler a tabela.
+    first_date_cell = (
+        frame.locator("tr td:first-child").filter(has_text=_DATE_PATTERN).first
+    )
+    try:
+        first_date_cell.wait_for(state="visible", timeout=timeout_ms)
+    except PlaywrightTimeoutError as exc:
+        raise PriceParseError("timeout ao carregar tabela PTAX") from exc
+    rows = _extract_ptax_rows(frame)
+    if not rows:
+        raise PriceParseError("tabela PTAX carregada sem linhas com data")
+    return rows
 
 
 def _find_ptax_frame(page):
@@ -116,86 +194,174 @@ def _load_ptax_frame(page, timeout_ms: int):
     )
 
 
-def _fetch_ptax(
-    currency_label: str,
-    symbol: str,
-    headless: bool = True,
-    timeout_ms: int = 45000,
-    lookback_days: int = 7,
-) -> PtaxQuote:
-    today = date.today()
-    start = today - timedelta(days=max(1, lookback_days))
-    target_date = _format_date(today)
-    buy_raw = ""
-    sell_raw = ""
+def _open_ptax_frame(
+    page,
+    *,
+    source_label: str,
+    navigation_timeout_ms: int,
+    selector_timeout_ms: int,
+    deadline: float,
+):
+    page.goto(
+        BCB_HISTORICO_URL,
+        wait_until="domcontentloaded",
+        timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+    )
+    ensure_page_consistency(
+        page,
+        source=f"BCB PTAX {source_label}",
+        checks=[
+            PageCheck(
+                "url esperada",
+                lambda p: (
+                    "bcb.gov.br/estabilidadefinanceira/historicocotacoes"
+                    in (p.url or "").lower(),
+                    f"url atual: {p.url}",
+                ),
+            ),
+        ],
+    )
+    frame = _load_ptax_frame(
+        page, remaining_timeout_ms(deadline, selector_timeout_ms)
+    )
+    _ensure_ptax_form(page, frame, source_label)
+    return frame
 
-    proxy = proxy_from_env()
-    try:
-        with chromium_page(
-            headless=headless,
-            proxy=proxy,
-            launch_args=["--no-sandbox"],
-        ) as page:
-            page.goto(
-                BCB_HISTORICO_URL,
-                wait_until="domcontentloaded",
-                timeout=timeout_ms,
-            )
-            ensure_page_consistency(
-                page,
-                source=f"BCB PTAX {currency_label}",
-                checks=[
-                    PageCheck(
-                        "url esperada",
-                        lambda p: (
-                            "bcb.gov.br/estabilidadefinanceira/historicocotacoes"
-                            in (p.url or "").lower(),
-                            f"url atual: {p.url}",
-                        ),
-                    ),
-                ],
-            )
-            frame = _load_ptax_frame(page, timeout_ms)
-            required_fields = [
-                ('input[name="RadOpcao"][value="1"]', "opcao de periodo"),
-                ('input[name="DATAINI"]', "campo DATAINI"),
-                ('input[name="DATAFIM"]', "campo DATAFIM"),
-                ('select[name="ChkMoeda"]', "combo de moeda"),
-                ('input[type="submit"]', "botao de consulta"),
-            ]
-            for selector, label in required_fields:
-                if frame.locator(selector).count() <= 0:
-                    raise PriceParseError(
-                        "estrutura da pagina possivelmente alterada em "
-                        f"BCB PTAX ({currency_label}); "
-                        f"campo ausente ({label}): {selector}; "
-                        f"{describe_page(page)}"
-                    )
-            frame.locator('input[name="RadOpcao"][value="1"]').check()
-            frame.locator('input[name="DATAINI"]').fill(_format_date(start))
-            frame.locator('input[name="DATAFIM"]').fill(target_date)
-            frame.locator('select[name="ChkMoeda"]').select_option(
-                label=currency_label
+
+def _ensure_ptax_form(page, frame, source_label: str) -> None:
+    counts = count_selectors(
+        frame, {label: selector for selector, label in _PTAX_FORM_FIELDS}
+    )
+    for selector, label in _PTAX_FORM_FIELDS:
+        if counts[label] <= 0:
+            raise PriceParseError(
+                "estrutura da pagina possivelmente alterada em "
+                f"BCB PTAX ({source_label}); "
+                f"campo ausente ({label}): {selector}; "
+                f"{describe_page(page)}"
             )
-            frame.locator('input[type="submit"]').click()
-
-            rows = _load_ptax_rows(frame, timeout_ms)
-            target_row = next((row for row in rows if row[0] == today), None)
-            if target_row is None:
-                last_row = max(rows, key=lambda row: row[0])
-                raise PriceParseError(
-                    "cotacao PTAX nao disponivel para "
-                    f"{target_date}; ultima data disponivel: {last_row[1]}"
-                )
-            buy_raw = target_row[2]
-            sell_raw = target_row[3]
-    except PlaywrightTimeoutError as exc:
+
+
+def _submit_ptax(
+    frame,
+    currency_label: str,
+    *,
+    start: date,
+    end: date,
+    timeout_ms: int,
+):
+    frame.locator('input[name="RadOpcao"][value="1"]').check()
+    frame.locator('input[name="DATAINI"]').fill(_format_date(start))
+    frame.locator('input[name="DATAFIM"]').fill(_format_date(end))
+    frame.locator('select[name="ChkMoeda"]').select_option(label=currency_label)
+    # O envio navega o iframe; a resposta dessa navegacao sinala que os dados
+    # chegaram, sem depender de polling do DOM.
+    with frame.page.expect_response(
+        lambda response: (
+            response.request.frame == frame
+            and response.request.is_navigation_request()
+        ),
+        timeout=timeout_ms,
+    ) as response_info:
+        frame.locator('input[type="submit"]').click()
+    response = response_info.value
+    if not response.ok:
         raise PriceParseError(
-            f"timeout ao buscar PTAX para {currency_label}"
-        ) from exc
-    except PageConsistencyError as exc:
-        raise PriceParseError(str(exc)) from exc
+            f"consulta PTAX ({currency_label}) retornou HTTP {response.status}"
+        )
+    return response
+
+
+def _scrape_current_rows(
+    frame,
+    today: date,
+    timeout_ms: int,
+    html: str = "",
+) -> tuple[str, str]:
+    # Le direto do HTML da resposta; o DOM do iframe so e consultado se o
+    # corpo nao trouxer linhas (ex.: tabela montada por script).
+    rows = _extract_ptax_rows_html(html) if html else []
+    if not rows:
+        rows = _load_ptax_rows(frame, timeout_ms)
+    return _pick_target_row(rows, today)
+
+
+def _pick_target_row(
+    rows: list[tuple[date, str, str, str]],
+    today: date,
+) -> tuple[str, str]:
+    target_row = next((row for row in rows if row[0] == today), None)
+    if target_row is None:
+        last_row = max(rows, key=lambda row: row[0])
+        raise PriceParseError(
+            "cotacao PTAX nao disponivel para "
+            f"{_format_date(today)}; ultima data disponivel: {last_row[1]}"
+        )
+    return target_row[2], target_row[3]
+
+
+def _read_ptax_quote_http(
+    currency_label: str,
+    *,
+    today: date,
+    start: date,
+    timeout_ms: int,
+) -> tuple[str, str] | None:
+    """Consulta o PTAX sem navegador; `None` indica que o Playwright deve assumir."""
+    currency_code = _PTAX_CURRENCY_CODES.get(currency_label)
+    if currency_code is None:
+        return None
+    try:
+        html = fetch_ptax_boletim_html(
+            currency_code, start, today, timeout_s=timeout_ms / 1000
+        )
+    except (OSError, ValueError, HTTPException):
+        return None
+    rows = _extract_ptax_rows_html(html)
+    if not rows:
+        return None
+    return _pick_target_row(rows, today)
+
 
+def _read_ptax_quote(
+    page,
+    currency_label: str,
+    *,
+    today: date,
+    start: date,
+    navigation_timeout_ms: int,
+    selector_timeout_ms: int,
+    overall_timeout_ms: int,
+) -> tuple[str, str]:
+    deadline = deadline_after(overall_timeout_ms)
+    frame = _open_ptax_frame(
+        page,
+        source_label=currency_label,
+        navigation_timeout_ms=navigation_timeout_ms,
+        selector_timeout_ms=selector_timeout_ms,
+        deadline=deadline,
+    )
+    response = _submit_ptax(
+        frame,
+        currency_label,
+        start=start,
+        end=today,
+        timeout_ms=remaining_timeout_ms(deadline, navigation_timeout_ms),
+    )
+    return _scrape_current_rows(
+        frame,
+        today,
+        remaining_timeout_ms(deadline, selector_timeout_ms),
+        _response_html(response),
+    )
+
+
+def _build_ptax_quote(
+    currency_label: str,
+    symbol: str,
+    buy_raw: str,
+    sell_raw: str,
+) -> PtaxQuote:
     if not buy_raw or not sell_raw:
         raise PriceParseError(
             f"nao encontrou cotacao PTAX para a data atual ({currency_label})"
@@ -216,43 +382,268 @@ def _fetch_ptax(
     )
 
 
+def _fetch_ptax(
+    currency_label: str,
+    symbol: str,
+    headless: bool = True,
+    lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
+    use_http: bool = True,
+    page=None,
+) -> PtaxQuote:
+    today = date.today()
+    start = today - timedelta(days=max(1, lookback_days))
+    if use_http and page is None:
+        raw_quote = _read_ptax_quote_http(
+            currency_label,
+            today=today,
+            start=start,
+            timeout_ms=navigation_timeout_ms,
+        )
+        if raw_quote is not None:
+            return _build_ptax_quote(currency_label, symbol, *raw_quote)
+
+    def _read(target_page) -> tuple[str, str]:
+        return _read_ptax_quote(
+            target_page,
+            currency_label,
+            today=today,
+            start=start,
+            navigation_timeout_ms=navigation_timeout_ms,
+            selector_timeout_ms=selector_timeout_ms,
+            overall_timeout_ms=overall_timeout_ms,
+        )
+
+    def _attempt() -> tuple[str, str]:
+        if page is not None:
+            return _read(page)
+        with chromium_page(
+            headless=headless,
+            proxy=proxy_from_env(),
+            launch_args=["--no-sandbox"],
+        ) as new_page:
+            return _read(new_page)
+
+    try:
+        buy_raw, sell_raw = retry_on_timeout(_attempt, retry_count=retry_count)
+    except PlaywrightTimeoutError as exc:
+        raise PriceParseError(
+            f"timeout ao buscar PTAX para {currency_label}"
+        ) from exc
+    except PageConsistencyError as exc:
+        raise PriceParseError(str(exc)) from exc
+
+    return _build_ptax_quote(currency_label, symbol, buy_raw, sell_raw)
+
+
 def fetch_dolar_ptax(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
     lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> PtaxQuote:
     return _fetch_ptax(
         currency_label=PTAX_USD_LABEL,
         symbol="USD/BRL PTAX",
         headless=headless,
-        timeout_ms=timeout_ms,
         lookback_days=lookback_days,
+        navigation_timeout_ms=navigation_timeout_ms,
+        selector_timeout_ms=selector_timeout_ms,
+        overall_timeout_ms=resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms),
+        retry_count=retry_count,
     )
 
 
 def fetch_euro_ptax(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
     lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> PtaxQuote:
     return _fetch_ptax(
         currency_label=PTAX_EUR_LABEL,
         symbol="EUR/BRL PTAX",
         headless=headless,
-        timeout_ms=timeout_ms,
         lookback_days=lookback_days,
+        navigation_timeout_ms=navigation_timeout_ms,
+        selector_timeout_ms=selector_timeout_ms,
+        overall_timeout_ms=resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms),
+        retry_count=retry_count,
     )
 
 
 def fetch_chf_ptax(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
     lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> PtaxQuote:
     return _fetch_ptax(
         currency_label=PTAX_CHF_LABEL,
         symbol="CHF/BRL PTAX",
         headless=headless,
-        timeout_ms=timeout_ms,
         lookback_days=lookback_days,
+        navigation_timeout_ms=navigation_timeout_ms,
+        selector_timeout_ms=selector_timeout_ms,
+        overall_timeout_ms=resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms),
+        retry_count=retry_count,
     )
+
+
+def fetch_ptax_multi(
+    labels: list[str],
+    headless: bool = True,
+    lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
+    use_http: bool = True,
+) -> dict[str, PtaxQuote]:
+    """Busca varias moedas PTAX na mesma pagina, reenviando o formulario.
+
+    Com `use_http=True` tenta antes a consulta direta ao BCB (sem navegador);
+    so as moedas sem resposta valida vao para o Chromium. Na pagina, o BCB e
+    o iframe sao carregados uma vez e entre moedas so o iframe volta ao
+    formulario. Retorna as cotacoes por label de moeda (ex.:
+    `PTAX_USD_LABEL`), cada uma com `overall_timeout_ms` proprio.
+    """
+    symbols = {label: symbol for _, label, symbol in _PTAX_CURRENCIES}
+    unknown = [label for label in labels if label not in symbols]
+    if unknown:
+        raise ValueError(f"moeda PTAX desconhecida: {', '.join(unknown)}")
+
+    today = date.today()
+    start = today - timedelta(days=max(1, lookback_days))
+    raw_quotes: dict[str, tuple[str, str]] = {}
+    if use_http:
+        for label in labels:
+            raw_quote = _read_ptax_quote_http(
+                label, today=today, start=start, timeout_ms=navigation_timeout_ms
+            )
+            if raw_quote is not None:
+                raw_quotes[label] = raw_quote
+    browser_labels = [label for label in labels if label not in raw_quotes]
+    source_label = ", ".join(browser_labels)
+
+    def _attempt() -> dict[str, tuple[str, str]]:
+        browser_quotes: dict[str, tuple[str, str]] = {}
+        with chromium_page(
+            headless=headless,
+            proxy=proxy_from_env(),
+            launch_args=["--no-sandbox"],
+        ) as page:
+            deadline = deadline_after(overall_timeout_ms)
+            frame = _open_ptax_frame(
+                page,
+                source_label=source_label,
+                navigation_timeout_ms=navigation_timeout_ms,
+                selector_timeout_ms=selector_timeout_ms,
+                deadline=deadline,
+            )
+            form_url = frame.url
+            for index, label in enumerate(browser_labels):
+                if index > 0:
+                    deadline = deadline_after(overall_timeout_ms)
+                    frame.goto(
+                        form_url,
+                        wait_until="domcontentloaded",
+                        timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+                    )
+                    _ensure_ptax_form(page, frame, label)
+                response = _submit_ptax(
+                    frame,
+                    label,
+                    start=start,
+                    end=today,
+                    timeout_ms=remaining_timeout_ms(deadline, navigation_timeout_ms),
+                )
+                browser_quotes[label] = _scrape_current_rows(
+                    frame,
+                    today,
+                    remaining_timeout_ms(deadline, selector_timeout_ms),
+                    _response_html(response),
+                )
+        return browser_quotes
+
+    if browser_labels:
+        try:
+            raw_quotes.update(retry_on_timeout(_attempt, retry_count=retry_count))
+        except PlaywrightTimeoutError as exc:
+            raise PriceParseError(
+                f"timeout ao buscar PTAX para {source_label}"
+            ) from exc
+        except PageConsistencyError as exc:
+            raise PriceParseError(str(exc)) from exc
+
+    return {
+        label: _build_ptax_quote(label, symbols[label], *raw_quotes[label])
+        for label in labels
+    }
+
+
+def fetch_all_ptax(
+    headless: bool = True,
+    timeout_ms: int | None = None,
+    lookback_days: int = 7,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
+) -> dict[str, PtaxQuote]:
+    """Busca PTAX USD/EUR/CHF em paralelo, uma thread (e contexto) por moeda.
+
+    Retorna as cotacoes por chave (`ptax_usd`, `ptax_eur`, `ptax_chf`); se
+    alguma moeda falhar, levanta `PriceParseError` com o detalhe de cada falha.
+    """
+    overall_timeout_ms = resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms)
+
+    def _worker(currency_label: str, symbol: str) -> PtaxQuote:
+        try:
+            return _fetch_ptax(
+                currency_label=currency_label,
+                symbol=symbol,
+                headless=headless,
+                lookback_days=lookback_days,
+                navigation_timeout_ms=navigation_timeout_ms,
+                selector_timeout_ms=selector_timeout_ms,
+                overall_timeout_ms=overall_timeout_ms,
+                retry_count=retry_count,
+            )
+        finally:
+            close_shared_browser()
+
+    with ThreadPoolExecutor(max_workers=len(_PTAX_CURRENCIES)) as executor:
+        futures = {
+            key: executor.submit(_worker, currency_label, symbol)
+            for key, currency_label, symbol in _PTAX_CURRENCIES
+        }
+
+    quotes: dict[str, PtaxQuote] = {}
+    failures: list[str] = []
+    for key, future in futures.items():
+        try:
+            quotes[key] = future.result()
+        except Exception as exc:
+            failures.append(f"{key}: {exc.__class__.__name__} {exc}")
+    if failures:
+        raise PriceParseError("falha ao buscar PTAX: " + " | ".join(failures))
+    return quotes
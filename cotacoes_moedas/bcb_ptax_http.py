@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import date
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from .playwright_utils import DEFAULT_USER_AGENT
+
+
+PTAX_BOLETIM_URL = (
+    "https://ptax.bcb.gov.br/ptax_internet/consultaBoletim.do"
+    "?method=consultarBoletim"
+)
+# Codigos do campo `ChkMoeda` no formulario do BCB.
+PTAX_USD_CODE = 61
+PTAX_EUR_CODE = 222
+PTAX_CHF_CODE = 97
+
+
+def fetch_ptax_boletim_html(
+    currency_code: int,
+    start: date,
+    end: date,
+    *,
+    timeout_s: float = 15,
+) -> str:
+    """Envia o formulario PTAX direto ao BCB (sem navegador) e devolve o HTML.
+
+    O proxy de `HTTP(S)_PROXY` e respeitado pelo `urllib`.
+    """
+    data = urlencode(
+        {
+            "RadOpcao": "1",
+            "DATAINI": start.strftime("%d/%m/%Y"),
+            "DATAFIM": end.strftime("%d/%m/%Y"),
+            "ChkMoeda": str(currency_code),
+        }
+    ).encode("ascii")
+    request = Request(
+        PTAX_BOLETIM_URL,
+        data=data,
+        headers={
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Content-Type": "application/x-www-form-urlencoded",
+        },
+    )
+    with urlopen(request, timeout=timeout_s) as response:
+        charset = response.headers.get_content_charset() or "latin-1"
+        return response.read().decode(charset, errors="replace")
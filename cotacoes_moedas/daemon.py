@@ -0,0 +1,260 @@
+"""Servidor local que mantem Playwright/Chromium aquecidos entre execucoes.
+
+`python -m cotacoes_moedas.daemon` inicia o servidor; `... daemon stop` o
+encerra. O `main.py` usa o daemon quando `COTACOES_DAEMON=1` e volta para a
+coleta local se ele nao estiver no ar.
+"""
+
+from __future__ import annotations
+
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client,
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+import os
+from pathlib import Path
+import queue
+import secrets
+import socket
+import sys
+import threading
+from typing import Callable
+
+from .bcb_ptax import (
+    fetch_all_ptax,
+    fetch_chf_ptax,
+    fetch_dolar_ptax,
+    fetch_euro_ptax,
+    fetch_ptax_multi,
+)
+from .investing import fetch_usd_brl
+from .juros import fetch_selic, fetch_tjlp
+from .playwright_utils import close_shared_browser, warm_up_browser
+from .valor_globo import fetch_dolar_turismo, fetch_dolar_turismo_cached
+
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 47650
+DAEMON_KEY_PATH = "~/.cache/cotacoes_moedas/daemon.key"
+_DAEMON_WORKERS = 4
+_SHUTDOWN = "shutdown"
+# Cliente que conecta e nao manda o pedido nesse prazo e descartado.
+_REQUEST_TIMEOUT_S = 10
+# Limite para a resposta do daemon; acima disso o `main.py` coleta localmente.
+CALL_TIMEOUT_S = 180
+
+FETCHERS: dict[str, Callable[..., object]] = {
+    fetch_fn.__name__: fetch_fn
+    for fetch_fn in (
+        fetch_usd_brl,
+        fetch_dolar_ptax,
+        fetch_euro_ptax,
+        fetch_chf_ptax,
+        fetch_all_ptax,
+        fetch_ptax_multi,
+        fetch_dolar_turismo,
+        fetch_dolar_turismo_cached,
+        fetch_tjlp,
+        fetch_selic,
+    )
+}
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def daemon_address() -> tuple[str, int]:
+    port = os.environ.get("COTACOES_DAEMON_PORT")
+    try:
+        return DAEMON_HOST, int(port) if port else DAEMON_PORT
+    except ValueError:
+        return DAEMON_HOST, DAEMON_PORT
+
+
+def _load_authkey(*, create: bool = False) -> bytes:
+    """Chave do daemon; so o servidor (`create=True`) gera o arquivo."""
+    env_key = os.environ.get("COTACOES_DAEMON_AUTHKEY")
+    if env_key:
+        return env_key.encode("utf-8")
+    key_path = Path(DAEMON_KEY_PATH).expanduser()
+    try:
+        key = key_path.read_bytes().strip()
+    except OSError:
+        key = b""
+    if key:
+        return key
+    if not create:
+        # Sem chave nao ha daemon iniciado; o cliente cai na coleta local.
+        raise FileNotFoundError(f"chave do daemon nao encontrada: {key_path}")
+    key = secrets.token_hex(32).encode("ascii")
+    key_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(key)
+    return key
+
+
+def _handle_request(request: object) -> dict[str, object]:
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "requisicao invalida"}
+    name = request.get("fn")
+    fetch_fn = FETCHERS.get(str(name))
+    if fetch_fn is None:
+        return {"ok": False, "error": f"funcao desconhecida: {name}"}
+    try:
+        return {"ok": True, "result": fetch_fn(**(request.get("args") or {}))}
+    except Exception as exc:
+        return {"ok": False, "error": f"{exc.__class__.__name__}: {exc}"}
+
+
+def _worker(requests: queue.Queue, warm_up: bool) -> None:
+    # Cada worker mantem o proprio navegador (o Playwright sync e por thread).
+    try:
+        if warm_up:
+            # Tira o launch do Chromium da primeira requisicao.
+            try:
+                warm_up_browser()
+            except Exception as exc:
+                print(
+                    "aviso: falha ao aquecer o navegador: "
+                    f"{exc.__class__.__name__}: {exc}",
+                    flush=True,
+                )
+        while True:
+            item = requests.get()
+            if item is None:
+                return
+            conn, request = item
+            with conn:
+                try:
+                    conn.send(_handle_request(request))
+                except OSError:
+                    continue
+    finally:
+        close_shared_browser()
+
+
+def _receive_request(
+    conn: Connection,
+    authkey: bytes,
+    requests: queue.Queue,
+    stop: threading.Event,
+    address: tuple[str, int],
+) -> None:
+    try:
+        # Mesma ordem do `Listener.accept` com authkey.
+        deliver_challenge(conn, authkey)
+        answer_challenge(conn, authkey)
+        if not conn.poll(_REQUEST_TIMEOUT_S):
+            raise TimeoutError("cliente nao enviou o pedido")
+        request = conn.recv()
+    except (OSError, EOFError, AuthenticationError):
+        conn.close()
+        return
+    if isinstance(request, dict) and request.get("fn") == _SHUTDOWN:
+        with conn:
+            conn.send({"ok": True, "result": None})
+        stop.set()
+        # Acorda o `accept` para o laco ver o `stop`.
+        try:
+            socket.create_connection(address, timeout=1).close()
+        except OSError:
+            pass
+        return
+    requests.put((conn, request))
+
+
+def serve(
+    address: tuple[str, int] | None = None,
+    *,
+    authkey: bytes | None = None,
+    workers: int = _DAEMON_WORKERS,
+    warm_up: bool = True,
+) -> None:
+    """Atende chamadas `{"fn": ..., "args": {...}}` ate receber `shutdown`.
+
+    Com `warm_up=True`, cada worker abre o Chromium ao subir.
+    """
+    requests: queue.Queue = queue.Queue()
+    threads = [
+        threading.Thread(target=_worker, args=(requests, warm_up), daemon=True)
+        for _ in range(max(1, workers))
+    ]
+    for thread in threads:
+        thread.start()
+
+    key = authkey or _load_authkey(create=True)
+    stop = threading.Event()
+    try:
+        # Sem authkey no Listener: o handshake fica na thread de cada conexao,
+        # entao um cliente lento ou com a chave errada nao trava o `accept`.
+        with Listener(address or daemon_address()) as listener:
+            bound_address = listener.address
+            while not stop.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError):
+                    continue
+                if stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(
+                    target=_receive_request,
+                    args=(conn, key, requests, stop, bound_address),
+                    daemon=True,
+                ).start()
+    finally:
+        for _ in threads:
+            requests.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def call(
+    fn_name: str,
+    *,
+    address: tuple[str, int] | None = None,
+    authkey: bytes | None = None,
+    timeout_s: float = CALL_TIMEOUT_S,
+    **kwargs: object,
+) -> object:
+    conn: Connection
+    with Client(address or daemon_address(), authkey=authkey or _load_authkey()) as conn:
+        conn.send({"fn": fn_name, "args": kwargs})
+        if not conn.poll(timeout_s):
+            raise TimeoutError(f"daemon sem resposta em {timeout_s}s para {fn_name}")
+        response = conn.recv()
+    if not response.get("ok"):
+        raise DaemonError(str(response.get("error")))
+    return response.get("result")
+
+
+def remote_fetch_fn(fetch_fn: Callable[[], object]) -> Callable[[], object]:
+    """Envolve `fetch_fn` para rodar no daemon; sem daemon no ar, roda local."""
+    name = fetch_fn.__name__
+    if name not in FETCHERS:
+        return fetch_fn
+
+    def _fetch() -> object:
+        try:
+            return call(name)
+        except (OSError, EOFError, AuthenticationError):
+            # Daemon fora do ar, com outra chave ou que caiu no meio da chamada.
+            return fetch_fn()
+
+    _fetch.__name__ = name
+    return _fetch
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["stop"]:
+        call(_SHUTDOWN)
+    else:
+        host, port = daemon_address()
+        print(f"daemon de cotacoes ouvindo em {host}:{port}", flush=True)
+        serve()
@@ -12,7 +12,18 @@ from .page_consistency import (
     PageConsistencyError,
     ensure_page_consistency,
 )
-from .playwright_utils import chromium_page, proxy_from_env
+from .playwright_utils import (
+    DEFAULT_RETRY_COUNT,
+    NAVIGATION_TIMEOUT_MS,
+    OVERALL_TIMEOUT_MS,
+    SELECTOR_TIMEOUT_MS,
+    chromium_page,
+    deadline_after,
+    proxy_from_env,
+    remaining_timeout_ms,
+    resolve_overall_timeout_ms,
+    retry_on_timeout,
+)
 
 
 USD_BRL_URL = "https://br.investing.com/currencies/usd-brl"
@@ -33,15 +44,29 @@ class Quote:
 
 def fetch_usd_brl(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> Quote:
+    overall_timeout_ms = resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms)
     proxy = proxy_from_env()
-    raw_value = ""
-    try:
+
+    def _attempt() -> str:
+        deadline = deadline_after(overall_timeout_ms)
         with chromium_page(headless=headless, proxy=proxy) as page:
-            page.goto(USD_BRL_URL, wait_until="commit", timeout=timeout_ms)
+            page.goto(
+                USD_BRL_URL,
+                wait_until="commit",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             locator = page.locator(USD_BRL_SELECTOR).first
-            locator.wait_for(state="visible", timeout=timeout_ms)
+            locator.wait_for(
+                state="visible",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             ensure_page_consistency(
                 page,
                 source="Investing USD/BRL",
@@ -55,14 +80,21 @@ def fetch_usd_brl(
                     ),
                     PageCheck(
                         "seletor principal",
-                        lambda p: (
-                            p.locator(USD_BRL_SELECTOR).count() > 0,
+                        lambda _p, counts: (
+                            counts["preco"] > 0,
                             f"seletor ausente: {USD_BRL_SELECTOR}",
                         ),
+                        uses_counts=True,
                     ),
                 ],
+                bulk_selectors={"preco": USD_BRL_SELECTOR},
             )
-            raw_value = locator.inner_text().strip()
+            return locator.inner_text(
+                timeout=remaining_timeout_ms(deadline, selector_timeout_ms)
+            ).strip()
+
+    try:
+        raw_value = retry_on_timeout(_attempt, retry_count=retry_count)
     except PlaywrightTimeoutError as exc:
         raise PriceParseError(
             "timeout ao aguardar o valor em instrument-price-last"
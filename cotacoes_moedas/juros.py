@@ -3,8 +3,14 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP, localcontext
+import functools
+import json
+import math
+import os
+from pathlib import Path
 import re
-import time
+import threading
+from typing import Callable
 
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
@@ -14,7 +20,18 @@ from .page_consistency import (
     PageConsistencyError,
     ensure_page_consistency,
 )
-from .playwright_utils import chromium_page, proxy_from_env
+from .playwright_utils import (
+    DEFAULT_RETRY_COUNT,
+    NAVIGATION_TIMEOUT_MS,
+    OVERALL_TIMEOUT_MS,
+    SELECTOR_TIMEOUT_MS,
+    chromium_page,
+    deadline_after,
+    proxy_from_env,
+    remaining_timeout_ms,
+    resolve_overall_timeout_ms,
+    retry_on_timeout,
+)
 
 
 TJLP_URL = (
@@ -22,12 +39,35 @@ TJLP_URL = (
     "custos-financeiros/taxa-juros-longo-prazo-tjlp"
 )
 SELIC_URL = "https://www.bcb.gov.br/controleinflacao/historicotaxasjuros"
-_DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+_DATE_SEARCH = re.compile(r"\d{2}/\d{2}/\d{4}")
 _PERCENT_RE = re.compile(r"(-?\d[\d\.,]*)\s*%")
-_HAS_DIGIT = re.compile(r"\d")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Varre a tabela no navegador e devolve so [data, taxa] da linha mais recente.
+_SELIC_LATEST_ROW_SCRIPT = """() => {
+  let best = null;
+  let bestKey = "";
+  for (const row of document.querySelectorAll("table tr")) {
+    const cells = row.querySelectorAll("td");
+    if (cells.length < 5) continue;
+    const dateText = (cells[1].innerText || "").replace(/\\s+/g, " ").trim();
+    const match = /^(\\d{2})\\/(\\d{2})\\/(\\d{4})$/.exec(dateText);
+    if (!match) continue;
+    const rateText = (cells[4].innerText || "").replace(/\\s+/g, " ").trim();
+    if (!/\\d/.test(rateText)) continue;
+    const key = match[3] + match[2] + match[1];
+    if (best === null || key > bestKey) {
+      best = [dateText, rateText];
+      bestKey = key;
+    }
+  }
+  return best;
+}"""
 _CDI_SPREAD = Decimal("0.10")
 _CDI_QUANTIZER = Decimal("0.0000000001")
 _CDI_BUSINESS_DAYS = Decimal("252")
+JUROS_CACHE_PATH = "~/.cache/cotacoes_moedas/juros.json"
+JUROS_CACHE_TTL_SECONDS = 6 * 3600
+_cache_lock = threading.Lock()
 
 
 class PriceParseError(RuntimeError):
@@ -43,10 +83,105 @@ class InterestRateQuote:
     collected_at: datetime
 
 
+def _quote_to_json(quote: InterestRateQuote) -> dict[str, str | None]:
+    return {
+        "name": quote.name,
+        "value": str(quote.value),
+        "value_raw": quote.value_raw,
+        "reference_date": (
+            quote.reference_date.isoformat() if quote.reference_date else None
+        ),
+        "collected_at": quote.collected_at.isoformat(),
+    }
+
+
+def _quote_from_json(data: dict[str, str | None]) -> InterestRateQuote:
+    reference_date = data.get("reference_date")
+    return InterestRateQuote(
+        name=str(data["name"]),
+        value=Decimal(str(data["value"])),
+        value_raw=str(data["value_raw"]),
+        reference_date=date.fromisoformat(reference_date) if reference_date else None,
+        collected_at=datetime.fromisoformat(str(data["collected_at"])),
+    )
+
+
+def _is_fresh(quote: InterestRateQuote, ttl_seconds: float) -> bool:
+    collected_at = quote.collected_at
+    if collected_at.tzinfo is None:
+        return False
+    age = (datetime.now(timezone.utc) - collected_at).total_seconds()
+    # Alem do TTL, so reaproveita valores coletados no mesmo dia local.
+    return 0 <= age < ttl_seconds and collected_at.astimezone().date() == date.today()
+
+
+def _read_cache(cache_path: Path) -> dict[str, dict[str, str | None]]:
+    try:
+        with cache_path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_cache(cache_path: Path, data: dict[str, dict[str, str | None]]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # Cache e apenas otimizacao; falha de escrita nao deve quebrar a coleta.
+        return
+
+
+def ttl_cache(
+    path: str | Path,
+    ttl_seconds: float,
+) -> Callable[[Callable[..., InterestRateQuote]], Callable[..., InterestRateQuote]]:
+    """Guarda em disco (JSON) a ultima cotacao de juros por nome de funcao.
+
+    Chamadas dentro do TTL (e no mesmo dia) devolvem o valor salvo sem abrir
+    o navegador; `force_refresh=True` ignora o cache e busca de novo.
+    """
+
+    def decorator(
+        fetch_fn: Callable[..., InterestRateQuote],
+    ) -> Callable[..., InterestRateQuote]:
+        key = fetch_fn.__name__
+
+        @functools.wraps(fetch_fn)
+        def wrapper(*args, force_refresh: bool = False, **kwargs) -> InterestRateQuote:
+            cache_path = Path(path).expanduser()
+            if not force_refresh:
+                with _cache_lock:
+                    entry = _read_cache(cache_path).get(key)
+                if entry:
+                    try:
+                        cached = _quote_from_json(entry)
+                    except (KeyError, TypeError, ValueError, ArithmeticError):
+                        cached = None
+                    if cached is not None and _is_fresh(cached, ttl_seconds):
+                        return cached
+
+            quote = fetch_fn(*args, **kwargs)
+            with _cache_lock:
+                data = _read_cache(cache_path)
+                data[key] = _quote_to_json(quote)
+                _write_cache(cache_path, data)
+            return quote
+
+        return wrapper
+
+    return decorator
+
+
 def _parse_percent_value(raw_text: str) -> Decimal:
-    text = " ".join((raw_text or "").split())
+    text = raw_text or ""
+    # `_PERCENT_RE` ja tolera espacos; so normaliza no fallback (mensagem de erro).
     match = _PERCENT_RE.search(text)
-    candidate = match.group(1) if match else text
+    candidate = match.group(1) if match else _WHITESPACE_RE.sub(" ", text).strip()
     try:
         return parse_pt_br_decimal(candidate)
     except ParseDecimalError as exc:
@@ -54,48 +189,59 @@ def _parse_percent_value(raw_text: str) -> Decimal:
 
 
 def _extract_latest_selic_row(page) -> tuple[date, str, str] | None:
-    latest: tuple[date, str, str] | None = None
-    rows = page.locator("table tr")
-    for index in range(rows.count()):
-        cells = rows.nth(index).locator("td")
-        if cells.count() < 5:
-            continue
-        date_raw = " ".join(cells.nth(1).inner_text().split())
-        if not _DATE_PATTERN.match(date_raw):
-            continue
-        rate_raw = " ".join(cells.nth(4).inner_text().split())
-        if not _HAS_DIGIT.search(rate_raw):
-            continue
-        try:
-            row_date = datetime.strptime(date_raw, "%d/%m/%Y").date()
-        except ValueError:
-            continue
-        if latest is None or row_date > latest[0]:
-            latest = (row_date, date_raw, rate_raw)
-    return latest
+    latest = page.evaluate(_SELIC_LATEST_ROW_SCRIPT)
+    if not latest:
+        return None
+    date_raw, rate_raw = latest
+    try:
+        row_date = datetime.strptime(date_raw, "%d/%m/%Y").date()
+    except ValueError:
+        return None
+    return row_date, date_raw, rate_raw
 
 
 def _wait_latest_selic_row(page, timeout_ms: int) -> tuple[date, str, str]:
-    deadline = time.monotonic() + (timeout_ms / 1000)
-    while time.monotonic() < deadline:
-        latest = _extract_latest_selic_row(page)
-        if latest is not None:
-            return latest
-        time.sleep(0.5)
-    raise PriceParseError("timeout ao carregar tabela da SELIC")
+    first_row = (
+        page.locator("table tr:has(td:nth-child(5))")
+        .filter(has_text=_DATE_SEARCH)
+        .first
+    )
+    try:
+        first_row.wait_for(state="visible", timeout=timeout_ms)
+    except PlaywrightTimeoutError as exc:
+        raise PriceParseError("timeout ao carregar tabela da SELIC") from exc
+    latest = _extract_latest_selic_row(page)
+    if latest is None:
+        raise PriceParseError("tabela da SELIC carregada sem linha valida")
+    return latest
 
 
+@ttl_cache(JUROS_CACHE_PATH, JUROS_CACHE_TTL_SECONDS)
 def fetch_tjlp(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> InterestRateQuote:
+    overall_timeout_ms = resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms)
     proxy = proxy_from_env()
-    raw_value = ""
-    try:
+
+    def _attempt() -> str:
+        deadline = deadline_after(overall_timeout_ms)
         with chromium_page(headless=headless, proxy=proxy) as page:
-            page.goto(TJLP_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+            page.goto(
+                TJLP_URL,
+                wait_until="commit",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             locator = page.locator("div.valor", has_text="%").first
-            locator.wait_for(state="visible", timeout=timeout_ms)
+            locator.wait_for(
+                state="visible",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             ensure_page_consistency(
                 page,
                 source="BNDES TJLP",
@@ -109,14 +255,21 @@ def fetch_tjlp(
                     ),
                     PageCheck(
                         "seletor de valor",
-                        lambda p: (
-                            p.locator("div.valor", has_text="%").count() > 0,
+                        lambda _p, counts: (
+                            counts["valor"] > 0,
                             "nao encontrou bloco com percentual da TJLP",
                         ),
+                        uses_counts=True,
                     ),
                 ],
+                bulk_selectors={"valor": ("div.valor", "%")},
             )
-            raw_value = locator.inner_text().strip()
+            return locator.inner_text(
+                timeout=remaining_timeout_ms(deadline, selector_timeout_ms)
+            ).strip()
+
+    try:
+        raw_value = retry_on_timeout(_attempt, retry_count=retry_count)
     except PlaywrightTimeoutError as exc:
         raise PriceParseError("timeout ao buscar TJLP no BNDES") from exc
     except PageConsistencyError as exc:
@@ -135,22 +288,36 @@ def fetch_tjlp(
     )
 
 
+@ttl_cache(JUROS_CACHE_PATH, JUROS_CACHE_TTL_SECONDS)
 def fetch_selic(
     headless: bool = True,
-    timeout_ms: int = 45000,
+    timeout_ms: int | None = None,
+    *,
+    navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS,
+    selector_timeout_ms: int = SELECTOR_TIMEOUT_MS,
+    overall_timeout_ms: int = OVERALL_TIMEOUT_MS,
+    retry_count: int = DEFAULT_RETRY_COUNT,
 ) -> InterestRateQuote:
+    overall_timeout_ms = resolve_overall_timeout_ms(timeout_ms, overall_timeout_ms)
     proxy = proxy_from_env()
-    reference_date: date | None = None
-    raw_value = ""
-    try:
+
+    def _attempt() -> tuple[date, str, str]:
+        deadline = deadline_after(overall_timeout_ms)
         with chromium_page(
             headless=headless,
             proxy=proxy,
             launch_args=["--no-sandbox"],
         ) as page:
-            page.goto(SELIC_URL, wait_until="domcontentloaded", timeout=timeout_ms)
+            page.goto(
+                SELIC_URL,
+                wait_until="commit",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             table = page.locator("table").first
-            table.wait_for(state="visible", timeout=timeout_ms)
+            table.wait_for(
+                state="visible",
+                timeout=remaining_timeout_ms(deadline, navigation_timeout_ms),
+            )
             ensure_page_consistency(
                 page,
                 source="BCB SELIC",
@@ -165,14 +332,23 @@ def fetch_selic(
                     ),
                     PageCheck(
                         "linhas da tabela",
-                        lambda p: (
-                            p.locator("table tr").count() > 1,
+                        lambda _p, counts: (
+                            counts["linhas"] > 1,
                             "tabela sem linhas suficientes para historico",
                         ),
+                        uses_counts=True,
                     ),
                 ],
+                bulk_selectors={"linhas": "table tr"},
             )
-            reference_date, _, raw_value = _wait_latest_selic_row(page, timeout_ms)
+            return _wait_latest_selic_row(
+                page, remaining_timeout_ms(deadline, selector_timeout_ms)
+            )
+
+    try:
+        reference_date, _, raw_value = retry_on_timeout(
+            _attempt, retry_count=retry_count
+        )
     except PlaywrightTimeoutError as exc:
         raise PriceParseError("timeout ao buscar SELIC no BCB") from exc
     except PageConsistencyError as exc:
@@ -201,8 +377,13 @@ def calculate_cdi_daily_percent(
     Regra alinhada ao calculo operacional em HP12C:
     FV = 100 + SELIC - 0,10; PV = 100; N = 252; calcula I.
     """
+    return _cdi_daily_percent(str(selic_annual_percent), str(annual_spread))
+
+
+@functools.lru_cache(maxsize=256)
+def _cdi_daily_percent(selic_annual_percent: str, annual_spread: str) -> Decimal:
     hundred = Decimal("100")
-    future_value = hundred + selic_annual_percent - annual_spread
+    future_value = hundred + Decimal(selic_annual_percent) - Decimal(annual_spread)
     if future_value <= 0:
         raise ValueError("valor final invalido para calcular CDI")
 
@@ -213,3 +394,18 @@ def calculate_cdi_daily_percent(
             - Decimal("1")
         ) * hundred
     return daily.quantize(_CDI_QUANTIZER, rounding=ROUND_HALF_UP)
+
+
+def calculate_cdi_daily_percent_fast(
+    selic_annual_percent: float,
+    *,
+    annual_spread: float = float(_CDI_SPREAD),
+) -> float:
+    """Versao em float do CDI diario (%), para simulacoes sem precisao de 10 casas.
+
+    Usa `log1p`/`expm1`, que preservam precisao para taxas pequenas.
+    """
+    rate = (selic_annual_percent - annual_spread) / 100
+    if rate <= -1:
+        raise ValueError("valor final invalido para calcular CDI")
+    return math.expm1(math.log1p(rate) / float(_CDI_BUSINESS_DAYS)) * 100
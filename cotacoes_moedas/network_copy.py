@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import os
 
 
@@ -11,6 +12,16 @@ def to_unc(path: str) -> str:
     if len(path) < 2 or path[1] != ":":
         return path
 
+    # Resolve so a raiz do drive (cacheada) e reaproveita para qualquer subpasta.
+    root = _drive_to_unc(path[:2].upper())
+    rest = path[2:].lstrip("\\/")
+    if not rest:
+        return root
+    return root.rstrip("\\/") + "\\" + rest
+
+
+@functools.lru_cache(maxsize=32)
+def _drive_to_unc(drive: str) -> str:
     import ctypes
     from ctypes import wintypes
 
@@ -30,8 +41,8 @@ def to_unc(path: str) -> str:
     ERROR_MORE_DATA = 234
     NO_ERROR = 0
 
-    normalized = path if len(path) > 2 else f"{path}\\"
-    buf_size = wintypes.DWORD(2048)
+    normalized = f"{drive}\\"
+    buf_size = wintypes.DWORD(4096)
     buf = ctypes.create_string_buffer(buf_size.value)
     res = WNetGetUniversalNameW(
         normalized, UNIVERSAL_NAME_INFO_LEVEL, buf, ctypes.byref(buf_size)
@@ -1,17 +1,70 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
 from pathlib import Path
 import shutil
+import subprocess
 
 from .network_copy import try_to_unc
 
 
+_COPY_WORKERS = 8
+_ROBOCOPY_THREADS = 16
+
+
 def parse_network_dirs(value: str | None) -> list[str]:
     if not value:
         return []
     return [item.strip() for item in value.split(";") if item.strip()]
 
 
+def _copy_with_robocopy(source: Path, destino: Path) -> bool:
+    robocopy = shutil.which("robocopy") if os.name == "nt" else None
+    if robocopy is None:
+        return False
+    result = subprocess.run(
+        [
+            robocopy,
+            str(source),
+            str(destino),
+            "/E",
+            f"/MT:{_ROBOCOPY_THREADS}",
+            "/R:1",
+            "/W:1",
+            "/NP",
+            "/NFL",
+            "/NDL",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
+    )
+    # Robocopy usa codigos < 8 para sucesso (com ou sem arquivos copiados).
+    if result.returncode >= 8:
+        raise OSError(f"robocopy falhou (codigo {result.returncode}) em {destino}")
+    return True
+
+
+def _copy_tree_parallel(source: Path, destino: Path) -> None:
+    """Cria a arvore de pastas em uma passada e copia os arquivos em paralelo."""
+    with ThreadPoolExecutor(max_workers=_COPY_WORKERS) as executor:
+        pending: list[Future] = []
+
+        def _submit_copy(src: str, dst: str) -> str:
+            pending.append(executor.submit(shutil.copy2, src, dst))
+            return dst
+
+        shutil.copytree(
+            source,
+            destino,
+            dirs_exist_ok=True,
+            copy_function=_submit_copy,
+        )
+        for future in pending:
+            future.result()
+
+
 def copiar_pasta_para_rede(
     origem: str | Path,
     destinos_base: list[str],
@@ -22,7 +75,8 @@ def copiar_pasta_para_rede(
     Repete a logica do script `teste_copia.py`:
     - tenta converter drive mapeado -> UNC (Windows)
     - cria a pasta `nome_pasta_destino`
-    - copia a pasta de origem para dentro dela
+    - copia a pasta de origem para dentro dela (robocopy /MT no Windows;
+      sem robocopy, arquivos copiados em paralelo)
 
     Estrutura final:
     `<destino_base>/<nome_pasta_destino>/<nome_da_pasta_origem>`
@@ -45,7 +99,8 @@ def copiar_pasta_para_rede(
         destino_completo = Path(destino_base_unc) / nome_pasta_destino / source.name
         try:
             destino_completo.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copytree(source, destino_completo, dirs_exist_ok=True)
+            if not _copy_with_robocopy(source, destino_completo):
+                _copy_tree_parallel(source, destino_completo)
         except Exception as exc:
             last_error = exc
             last_unc_error = unc_error
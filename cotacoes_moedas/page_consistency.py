@@ -3,7 +3,26 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Callable
 
-from playwright.sync_api import Page
+from playwright.sync_api import Frame, Page
+
+
+# Cada entrada e um seletor CSS ou `[seletor, texto]` (equivale ao `has_text`:
+# conta so os elementos cujo texto contem `texto`).
+_COUNT_SELECTORS_SCRIPT = """selectors => Object.fromEntries(
+  Object.entries(selectors).map(([key, spec]) => {
+    const [selector, text] = Array.isArray(spec) ? spec : [spec, null];
+    const nodes = document.querySelectorAll(selector);
+    if (text === null) {
+      return [key, nodes.length];
+    }
+    const needle = text.toLowerCase();
+    return [key, Array.from(nodes).filter(
+      (node) => (node.textContent || "").toLowerCase().includes(needle)
+    ).length];
+  })
+)"""
+# Seletor CSS, ou (seletor, texto) para filtrar pelo texto do elemento.
+SelectorSpec = str | tuple[str, str]
 
 
 class PageConsistencyError(RuntimeError):
@@ -12,8 +31,26 @@ class PageConsistencyError(RuntimeError):
 
 @dataclass(frozen=True)
 class PageCheck:
+    """Validacao de estrutura da pagina.
+
+    Com `uses_counts=True`, `validate` recebe `(page, counts)`, onde `counts`
+    traz as contagens de `bulk_selectors` lidas em uma unica chamada.
+    """
+
     name: str
-    validate: Callable[[Page], tuple[bool, str]]
+    validate: Callable[..., tuple[bool, str]]
+    uses_counts: bool = False
+
+
+def count_selectors(
+    target: Page | Frame,
+    selectors: dict[str, SelectorSpec],
+) -> dict[str, int]:
+    """Conta elementos de varios seletores CSS com um unico evaluate."""
+    if not selectors:
+        return {}
+    raw_counts = target.evaluate(_COUNT_SELECTORS_SCRIPT, selectors)
+    return {key: int(raw_counts.get(key, 0)) for key in selectors}
 
 
 def describe_page(page: Page) -> str:
@@ -33,11 +70,25 @@ def ensure_page_consistency(
     *,
     source: str,
     checks: list[PageCheck],
+    bulk_selectors: dict[str, SelectorSpec] | None = None,
 ) -> None:
     failures: list[str] = []
+    counts: dict[str, int] = {}
+    counts_error: Exception | None = None
+    if bulk_selectors:
+        try:
+            counts = count_selectors(page, bulk_selectors)
+        except Exception as exc:
+            counts_error = exc
+
     for check in checks:
         try:
-            ok, detail = check.validate(page)
+            if not check.uses_counts:
+                ok, detail = check.validate(page)
+            elif counts_error is not None:
+                raise counts_error
+            else:
+                ok, detail = check.validate(page, counts)
         except Exception as exc:
             failures.append(
                 f"{check.name}: excecao {exc.__class__.__name__} {exc}"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from decimal import Decimal, InvalidOperation
+from html.parser import HTMLParser
 import re
 
 
@@ -9,6 +10,23 @@ class ParseDecimalError(ValueError):
 
 
 _NON_NUMERIC = re.compile(r"[^\d,.-]")
+# Remove em C os ruidos mais comuns (moeda, espacos, percentual); o regex so
+# entra quando sobra algum outro caractere nao numerico.
+_COMMON_NOISE = str.maketrans("", "", "R$ \u00a0\t\r\n%")
+_NUMERIC_CHARS = frozenset("0123456789,.-")
+
+
+def is_br_date(text: str) -> bool:
+    """Confere o formato dd/mm/aaaa com operacoes de string (sem regex)."""
+    return (
+        len(text) == 10
+        and text[2] == "/"
+        and text[5] == "/"
+        and text.isascii()
+        and text[:2].isdigit()
+        and text[3:5].isdigit()
+        and text[6:].isdigit()
+    )
 
 
 def parse_pt_br_decimal(text: str) -> Decimal:
@@ -16,11 +34,68 @@ def parse_pt_br_decimal(text: str) -> Decimal:
 
     Exemplos aceitos: "5,2849", "5.284,90", "R$ 5,2849".
     """
-    cleaned = _NON_NUMERIC.sub("", (text or "")).strip()
+    cleaned = text or ""
+    # Caso comum ("5,4120") ja vem limpo e pula a limpeza inteira.
+    if not _NUMERIC_CHARS.issuperset(cleaned):
+        cleaned = cleaned.translate(_COMMON_NOISE)
+        if not _NUMERIC_CHARS.issuperset(cleaned):
+            cleaned = _NON_NUMERIC.sub("", cleaned)
     if "," in cleaned:
-        cleaned = cleaned.replace(".", "").replace(",", ".")
+        if "." in cleaned:
+            cleaned = cleaned.replace(".", "")
+        cleaned = cleaned.replace(",", ".")
     try:
         return Decimal(cleaned)
     except (InvalidOperation, ValueError) as exc:
         raise ParseDecimalError(f"valor invalido: {text!r}") from exc
 
+
+class _TableRowsParser(HTMLParser):
+    """Coleta o texto das celulas `td` de cada `tr` de um HTML."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.rows: list[list[str]] = []
+        self._row: list[str] | None = None
+        self._cell: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag == "td" and self._row is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "td":
+            self._close_cell()
+        elif tag in ("tr", "table"):
+            self._close_row()
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._close_row()
+
+    def _close_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+        self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = None
+
+
+def html_table_rows(html: str) -> list[list[str]]:
+    """Texto das celulas `td` de cada `tr`, com espacos normalizados."""
+    parser = _TableRowsParser()
+    parser.feed(html)
+    parser.close()
+    return parser.rows
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import atexit
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 import os
-from typing import Iterator
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import BinaryIO, Callable, Iterator, TypeVar
 from urllib.parse import unquote, urlparse
+import warnings
 
-from playwright.sync_api import Page, sync_playwright
+from playwright.sync_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    TimeoutError as PlaywrightTimeoutError,
+    sync_playwright,
+)
 
 
 DEFAULT_USER_AGENT = (
@@ -15,6 +29,68 @@ DEFAULT_USER_AGENT = (
 DEFAULT_LOCALE = "pt-BR"
 DEFAULT_VIEWPORT = {"width": 1366, "height": 768}
 DEFAULT_CHROMIUM_ARGS = ["--disable-blink-features=AutomationControlled"]
+CHROMIUM_PROFILE_ROOT = "~/.cache/cotacoes_moedas/chromium"
+DEFAULT_BLOCKED_RESOURCES = frozenset({"image", "font", "media"})
+# Bloqueio por extensao via CDP: `page.route` desligaria o cache HTTP do perfil.
+_RESOURCE_URL_PATTERNS: dict[str, tuple[str, ...]] = {
+    "image": (
+        "*.png",
+        "*.jpg",
+        "*.jpeg",
+        "*.gif",
+        "*.webp",
+        "*.avif",
+        "*.svg",
+        "*.ico",
+    ),
+    "font": ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"),
+    "media": ("*.mp4", "*.webm", "*.mp3", "*.ogg", "*.m3u8"),
+    "stylesheet": ("*.css",),
+    "tracker": (
+        "*googletagmanager.com*",
+        "*google-analytics.com*",
+        "*doubleclick.net*",
+        "*googlesyndication.com*",
+        "*scorecardresearch.com*",
+        "*facebook.net*",
+    ),
+}
+_MAX_PROFILE_SLOTS = 8
+# Com `wait_until="commit"`, a primeira espera de seletor tambem usa o prazo
+# de navegacao, pois cobre o carregamento do documento.
+NAVIGATION_TIMEOUT_MS = 15000
+SELECTOR_TIMEOUT_MS = 5000
+OVERALL_TIMEOUT_MS = 20000
+DEFAULT_RETRY_COUNT = 2
+_RETRY_BACKOFF_SECONDS = 1.0
+
+T = TypeVar("T")
+
+
+@dataclass
+class _ProfileSlot:
+    path: Path
+    lock_handle: BinaryIO
+
+
+@dataclass
+class _SharedPlaywright:
+    playwright: Playwright
+    browsers: dict[tuple[bool, tuple[str, ...]], Browser] = field(default_factory=dict)
+    cdp_browsers: dict[str, Browser] = field(default_factory=dict)
+    persistent_contexts: dict[tuple[object, ...], BrowserContext] = field(
+        default_factory=dict
+    )
+    profile_slots: list[_ProfileSlot] = field(default_factory=list)
+
+
+# O Playwright sync e preso a thread que o iniciou; por isso o navegador
+# compartilhado e mantido por thread (cada worker reaproveita o seu).
+_thread_state = threading.local()
+# Estados ainda abertos de todas as threads (id -> (nome da thread, estado)),
+# para o atexit apontar workers que nao fecharam o proprio navegador.
+_open_states: dict[int, tuple[str, _SharedPlaywright]] = {}
+_open_states_lock = threading.Lock()
 
 
 def proxy_from_env() -> dict[str, str] | None:
@@ -37,6 +113,275 @@ def proxy_from_env() -> dict[str, str] | None:
     return proxy
 
 
+def cdp_url_from_env() -> str | None:
+    """Endereco de um Chromium ja aberto (`COTACOES_CDP_URL`), se configurado."""
+    return os.environ.get("COTACOES_CDP_URL") or None
+
+
+def resolve_overall_timeout_ms(
+    timeout_ms: int | None,
+    overall_timeout_ms: int,
+) -> int:
+    """Mapeia o antigo `timeout_ms` (obsoleto) para `overall_timeout_ms`."""
+    if timeout_ms is None:
+        return overall_timeout_ms
+    warnings.warn(
+        "timeout_ms esta obsoleto; use overall_timeout_ms",
+        DeprecationWarning,
+        stacklevel=3,
+    )
+    return timeout_ms
+
+
+def deadline_after(timeout_ms: int) -> float:
+    return time.monotonic() + (timeout_ms / 1000)
+
+
+def remaining_timeout_ms(deadline: float, timeout_ms: int) -> int:
+    """Limita `timeout_ms` ao tempo que falta ate `deadline` (monotonic)."""
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise PlaywrightTimeoutError("tempo total da coleta esgotado")
+    return min(timeout_ms, remaining_ms)
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    current: BaseException | None = exc
+    while current is not None:
+        if isinstance(current, PlaywrightTimeoutError):
+            return True
+        current = current.__cause__
+    return False
+
+
+def retry_on_timeout(
+    fetch_fn: Callable[[], T],
+    *,
+    retry_count: int = DEFAULT_RETRY_COUNT,
+    backoff_seconds: float = _RETRY_BACKOFF_SECONDS,
+) -> T:
+    """Executa `fetch_fn`, repetindo em timeout com backoff exponencial (1s, 2s...).
+
+    Outros erros (estrutura da pagina, parse) sobem na primeira tentativa.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fetch_fn()
+        except Exception as exc:
+            if attempt >= retry_count or not is_timeout_error(exc):
+                raise
+        time.sleep(backoff_seconds * (2**attempt))
+        attempt += 1
+
+
+def _merge_launch_args(launch_args: list[str] | None) -> list[str]:
+    args = list(DEFAULT_CHROMIUM_ARGS)
+    for arg in launch_args or ():
+        if arg not in args:
+            args.append(arg)
+    return args
+
+
+def _shared_state() -> _SharedPlaywright:
+    state: _SharedPlaywright | None = getattr(_thread_state, "state", None)
+    if state is None:
+        state = _SharedPlaywright(playwright=sync_playwright().start())
+        _thread_state.state = state
+        with _open_states_lock:
+            _open_states[id(state)] = (threading.current_thread().name, state)
+    return state
+
+
+def _try_lock(handle: BinaryIO) -> bool:
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _acquire_profile_slot(root: Path) -> _ProfileSlot | None:
+    # O Chromium nao aceita dois processos no mesmo user-data-dir; cada
+    # navegador persistente reserva um perfil livre via lock de arquivo.
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    for slot in range(_MAX_PROFILE_SLOTS):
+        try:
+            handle = open(root / f"profile-{slot}.lock", "a+b")
+        except OSError:
+            continue
+        if _try_lock(handle):
+            return _ProfileSlot(path=root / f"profile-{slot}", lock_handle=handle)
+        handle.close()
+    return None
+
+
+def get_shared_browser(
+    *,
+    headless: bool = True,
+    launch_args: list[str] | None = None,
+) -> Browser:
+    """Retorna o Chromium compartilhado da thread atual, iniciando-o se preciso.
+
+    Cada combinacao de `headless` + argumentos de launch gera um navegador
+    proprio, reaproveitado nas chamadas seguintes da mesma thread. Com
+    `COTACOES_CDP_URL`, conecta no Chromium externo em vez de iniciar um.
+    """
+    state = _shared_state()
+    cdp_url = cdp_url_from_env()
+    if cdp_url:
+        # Chromium externo compartilhado entre processos; `headless` e os
+        # argumentos de launch ficam a cargo de quem o iniciou.
+        browser = state.cdp_browsers.get(cdp_url)
+        if browser is None or not browser.is_connected():
+            browser = state.playwright.chromium.connect_over_cdp(cdp_url)
+            state.cdp_browsers[cdp_url] = browser
+        return browser
+
+    args = _merge_launch_args(launch_args)
+    key = (headless, tuple(args))
+    browser = state.browsers.get(key)
+    if browser is None or not browser.is_connected():
+        browser = state.playwright.chromium.launch(headless=headless, args=args)
+        state.browsers[key] = browser
+    return browser
+
+
+def _get_persistent_context(
+    *,
+    headless: bool,
+    proxy: dict[str, str] | None,
+    launch_args: list[str] | None,
+    user_agent: str,
+    locale: str,
+    viewport: dict[str, int],
+) -> BrowserContext | None:
+    args = _merge_launch_args(launch_args)
+    key = (
+        headless,
+        tuple(args),
+        tuple(sorted((proxy or {}).items())),
+        user_agent,
+        locale,
+        tuple(sorted(viewport.items())),
+    )
+
+    state = _shared_state()
+    context = state.persistent_contexts.get(key)
+    if context is not None:
+        return context
+
+    slot = _acquire_profile_slot(Path(CHROMIUM_PROFILE_ROOT).expanduser())
+    if slot is None:
+        return None
+    try:
+        context = state.playwright.chromium.launch_persistent_context(
+            str(slot.path),
+            headless=headless,
+            args=args,
+            proxy=proxy,
+            user_agent=user_agent,
+            locale=locale,
+            viewport=viewport,
+        )
+    except Exception:
+        slot.lock_handle.close()
+        raise
+    state.persistent_contexts[key] = context
+    state.profile_slots.append(slot)
+    return context
+
+
+def _block_resources(page: Page, resource_types: frozenset[str] | set[str]) -> None:
+    patterns = [
+        pattern
+        for resource_type in sorted(resource_types)
+        for pattern in _RESOURCE_URL_PATTERNS.get(resource_type, ())
+    ]
+    if not patterns:
+        return
+    try:
+        session = page.context.new_cdp_session(page)
+        session.send("Network.enable")
+        session.send("Network.setBlockedURLs", {"urls": patterns})
+    except Exception:
+        # Bloqueio e apenas otimizacao; segue com a pagina completa.
+        return
+
+
+def close_shared_browser() -> None:
+    """Fecha os navegadores compartilhados e o Playwright da thread atual.
+
+    Toda thread que usa `chromium_page` deve chamar isto ao terminar: o
+    Playwright sync nao aceita ser fechado por outra thread, e o atexit so
+    fecha o da thread que encerra o processo.
+    """
+    state: _SharedPlaywright | None = getattr(_thread_state, "state", None)
+    if state is None:
+        return
+    _thread_state.state = None
+    with _open_states_lock:
+        _open_states.pop(id(state), None)
+    try:
+        for context in state.persistent_contexts.values():
+            try:
+                context.close()
+            except Exception:
+                continue
+        # Em navegador conectado por CDP, `close` so desconecta.
+        for browser in (*state.browsers.values(), *state.cdp_browsers.values()):
+            try:
+                browser.close()
+            except Exception:
+                continue
+    finally:
+        state.persistent_contexts.clear()
+        state.browsers.clear()
+        state.cdp_browsers.clear()
+        for slot in state.profile_slots:
+            slot.lock_handle.close()
+        state.profile_slots.clear()
+        try:
+            state.playwright.stop()
+        except Exception:
+            pass
+
+
+def _close_shared_browsers_at_exit() -> None:
+    close_shared_browser()
+    with _open_states_lock:
+        leftovers = list(_open_states.values())
+        _open_states.clear()
+    for thread_name, state in leftovers:
+        # Daqui nao da para usar o Playwright de outra thread; libera os perfis
+        # e avisa. O driver fecha os navegadores dele quando o processo sai.
+        for slot in state.profile_slots:
+            try:
+                slot.lock_handle.close()
+            except OSError:
+                pass
+        state.profile_slots.clear()
+        print(
+            f"aviso: navegador da thread {thread_name!r} nao foi fechado; "
+            "chame close_shared_browser() ao fim de cada worker",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+atexit.register(_close_shared_browsers_at_exit)
+
+
 @contextmanager
 def chromium_page(
     *,
@@ -46,24 +391,56 @@ def chromium_page(
     user_agent: str = DEFAULT_USER_AGENT,
     locale: str = DEFAULT_LOCALE,
     viewport: dict[str, int] | None = None,
+    use_persistent: bool = True,
+    block_resources: frozenset[str] | set[str] | None = DEFAULT_BLOCKED_RESOURCES,
 ) -> Iterator[Page]:
-    args = list(DEFAULT_CHROMIUM_ARGS)
-    if launch_args:
-        args.extend(launch_args)
-    with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(
+    """Abre uma pagina no Chromium compartilhado da thread.
+
+    Com `use_persistent=True` a pagina usa um perfil em disco
+    (`CHROMIUM_PROFILE_ROOT`), mantendo o cache HTTP entre execucoes; sem
+    perfil livre (ou com `COTACOES_CDP_URL`), cai para um contexto anonimo no
+    navegador compartilhado.
+    `block_resources` define os tipos de recurso (image, font, media,
+    stylesheet, tracker) que nao sao baixados; `None` desliga o bloqueio.
+    """
+    persistent = None
+    # O Chromium externo (CDP) ja tem o proprio perfil; usa contexto anonimo nele.
+    if use_persistent and not cdp_url_from_env():
+        persistent = _get_persistent_context(
             headless=headless,
-            args=args,
             proxy=proxy,
+            launch_args=launch_args,
+            user_agent=user_agent,
+            locale=locale,
+            viewport=viewport or DEFAULT_VIEWPORT,
         )
+    if persistent is not None:
+        page = persistent.new_page()
         try:
-            context = browser.new_context(
-                user_agent=user_agent,
-                locale=locale,
-                viewport=viewport or DEFAULT_VIEWPORT,
-            )
-            page = context.new_page()
+            if block_resources:
+                _block_resources(page, block_resources)
             yield page
         finally:
-            browser.close()
+            page.close()
+        return
+
+    browser = get_shared_browser(headless=headless, launch_args=launch_args)
+    context = browser.new_context(
+        user_agent=user_agent,
+        locale=locale,
+        viewport=viewport or DEFAULT_VIEWPORT,
+        proxy=proxy,
+    )
+    try:
+        page = context.new_page()
+        if block_resources:
+            _block_resources(page, block_resources)
+        yield page
+    finally:
+        context.close()
+
 
+def warm_up_browser(*, headless: bool = True) -> None:
+    """Inicia o Playwright/Chromium da thread atual antes da primeira coleta."""
+    with chromium_page(headless=headless):
+        pass
@@ -5,11 +5,19 @@ import re
 
 _URL_CREDENTIALS_RE = re.compile(r"([a-zA-Z][a-zA-Z0-9+.-]*://)([^@\s/]+)@")
 _PASSWORD_PAIR_RE = re.compile(r"(?i)\b(password|passwd|pwd)\b\s*[:=]\s*\S+")
+_PASSWORD_MARKERS = ("password", "passwd", "pwd")
 
 
 def redact_secrets(text: str) -> str:
     if not text:
         return text
+    # Busca por substring e bem mais barata que o regex; a maioria das linhas
+    # de log nao tem nenhum marcador e volta sem passar pelo `re`.
+    has_url_credentials = "@" in text and "://" in text
+    lowered = text.lower()
+    has_password_pair = any(marker in lowered for marker in _PASSWORD_MARKERS)
+    if not has_url_credentials and not has_password_pair:
+        return text
 
     def _mask(match: re.Match[str]) -> str:
         scheme = match.group(1)
@@ -19,6 +27,8 @@ def redact_secrets(text: str) -> str:
             return f"{scheme}{username}:***@"
         return f"{scheme}***@"
 
-    redacted = _URL_CREDENTIALS_RE.sub(_mask, text)
+    redacted = _URL_CREDENTIALS_RE.sub(_mask, text) if has_url_credentials else text
+    if not has_password_pair:
+        return redacted
     return _PASSWORD_PAIR_RE.sub(lambda match: f"{match.group(1)}=***", redacted)
 
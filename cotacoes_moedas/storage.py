@@ -1,17 +1,32 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone, tzinfo
 from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
 from pathlib import Path
 import csv
+import hashlib
+import io
+import json
+import os
 import re
-from typing import Callable
+import threading
+from typing import Callable, Iterable, Iterator
+from weakref import WeakKeyDictionary
+from zipfile import ZIP_DEFLATED, ZipFile
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.writer.excel import ExcelWriter
 
 from .bcb_ptax import PtaxQuote
 from .investing import Quote
+from .parsing import is_br_date
 from .valor_globo import BidAskQuote
 
 
@@ -21,15 +36,60 @@ _DATE_NUMBER_FORMAT = "dd/mm/yyyy"
 _QUOTE_NUMBER_FORMAT = "0.0000"
 _PERCENT_NUMBER_FORMAT = "0.00%"
 _CDI_NUMBER_FORMAT = "0.0000000000"
-_DATE_PATTERN = re.compile(r"^\d{2}/\d{2}/\d{4}$")
-_LOCAL_TZ = datetime.now().astimezone().tzinfo or timezone.utc
+_LOCAL_TZ_NAME = "America/Sao_Paulo"
+
+
+def _resolve_local_tz() -> tzinfo:
+    # ZoneInfo acompanha mudancas de horario de verao; no Windows sem `tzdata`
+    # o fuso nao existe e cai para o offset atual da maquina.
+    try:
+        return ZoneInfo(_LOCAL_TZ_NAME)
+    except ZoneInfoNotFoundError:
+        return datetime.now().astimezone().tzinfo or timezone.utc
+
+
+_LOCAL_TZ = _resolve_local_tz()
 _LOG_COLUMN_INDEX = 15
-_TJLP_COLUMN = "L"
-_SELIC_COLUMN = "M"
-_CDI_COLUMN = "N"
+_TJLP_COLUMN_INDEX = 12
+_SELIC_COLUMN_INDEX = 13
+_CDI_COLUMN_INDEX = 14
 _LOG_COLUMN = "O"
+# Indice data -> (offset, tamanho) das linhas do CSV, fora de `planilhas/`
+# para nao ser copiado para a rede junto com as planilhas.
+CSV_INDEX_DIR = "~/.cache/cotacoes_moedas/csv_index"
+_CSV_WRITE_BUFFER = 1 << 20
+# Workbooks ja gravados, por caminho: (workbook, assinatura do arquivo).
+# Chamadas seguidas no mesmo processo pulam o load se o arquivo nao mudou por fora.
+_WORKBOOK_CACHE: dict[Path, tuple[object, tuple[object, ...]]] = {}
+_WORKBOOK_CACHE_SIZE = 4
+_XLSX_COMPRESSLEVEL = 1
+_workbook_cache_lock = threading.Lock()
+_NUM_CLEAN_RE = re.compile(r"[^\d,.-]")
+_WS_RE = re.compile(r"\s+")
+_LOG_STATUSES = frozenset({"OK", "ERRO"})
+# Fontes de compra/venda prontas: fonte -> (coluna compra, coluna venda).
+_BID_ASK_COLUMNS: dict[str, tuple[int, int]] = {
+    "ptax_usd": (4, 5),
+    "turismo": (6, 7),
+    "ptax_eur": (8, 9),
+    "ptax_chf": (10, 11),
+}
+# Cabecalhos da linha 2 para as colunas L..O (a linha 1 fica vazia nelas).
+_INTEREST_HEADERS = (
+    (_TJLP_COLUMN_INDEX, "TJLP"),
+    (_SELIC_COLUMN_INDEX, "SELIC"),
+    (_CDI_COLUMN_INDEX, "CDI"),
+    (_LOG_COLUMN_INDEX, "Situação"),
+)
 _FIRST_COLUMN = "A"
 _LAST_COLUMN_INDEX = 15
+_COLUMN_NUMBER_FORMATS = (
+    (1, _DATE_NUMBER_FORMAT),
+    (_TJLP_COLUMN_INDEX, _PERCENT_NUMBER_FORMAT),
+    (_SELIC_COLUMN_INDEX, _PERCENT_NUMBER_FORMAT),
+    (_CDI_COLUMN_INDEX, _CDI_NUMBER_FORMAT),
+)
+_HEADER_MERGES = frozenset({"B1:C1", "D1:E1", "F1:G1", "H1:I1", "J1:K1"})
 _DEFAULT_CSV_HEADER = [
     "Data",
     "Dolar Oficial Compra",
@@ -100,13 +160,15 @@ def _is_blank(value: object) -> bool:
 
 def _set_cell(
     sheet,
-    address: str,
+    row: int,
+    column: int,
     value: object,
     *,
     number_format: str | None = None,
     overwrite: bool = True,
 ) -> bool:
-    cell = sheet[address]
+    # `sheet.cell` evita o parse de coordenada ("B12") de `sheet[...]`.
+    cell = sheet.cell(row=row, column=column)
     if not overwrite and not _is_blank(cell.value):
         return False
     cell.value = value
@@ -115,24 +177,52 @@ def _set_cell(
     return True
 
 
+def _write_bid_ask(
+    sheet,
+    row: int,
+    buy_column: int,
+    sell_column: int,
+    quote: PtaxQuote | BidAskQuote,
+    *,
+    overwrite: bool,
+) -> tuple[str, ...]:
+    """Grava compra/venda da cotacao e retorna os campos efetivamente gravados."""
+    written = []
+    if _set_cell(
+        sheet,
+        row,
+        buy_column,
+        _quantize_4(quote.buy),
+        number_format=_QUOTE_NUMBER_FORMAT,
+        overwrite=overwrite,
+    ):
+        written.append("compra")
+    if _set_cell(
+        sheet,
+        row,
+        sell_column,
+        _quantize_4(quote.sell),
+        number_format=_QUOTE_NUMBER_FORMAT,
+        overwrite=overwrite,
+    ):
+        written.append("venda")
+    return tuple(written)
+
+
 def _looks_like_log(value: object) -> bool:
     if not isinstance(value, str):
         return False
-    text = " ".join(value.split()).upper()
-    return text.startswith("OK ") or text.startswith("ERRO ")
+    # Primeira palavra OK/ERRO seguida de mais texto, sem normalizar o resto.
+    parts = value.split(maxsplit=1)
+    return len(parts) == 2 and parts[0].upper() in _LOG_STATUSES
 
 
 def _ensure_layout(sheet) -> None:
     # Mantem compatibilidade com planilhas antigas (log na coluna L)
     # e garante os cabecalhos finais na linha 2.
-    sheet["L1"] = None
-    sheet["M1"] = None
-    sheet["N1"] = None
-    sheet["O1"] = None
-    sheet["L2"] = "TJLP"
-    sheet["M2"] = "SELIC"
-    sheet["N2"] = "CDI"
-    sheet["O2"] = "Situação"
+    for column, header in _INTEREST_HEADERS:
+        sheet.cell(row=1, column=column).value = None
+        sheet.cell(row=2, column=column).value = header
 
     for row in range(3, sheet.max_row + 1):
         old_log = sheet.cell(row=row, column=12).value
@@ -148,11 +238,15 @@ def _apply_visual_style(sheet) -> None:
     last_data_row = _find_last_date_row(sheet) or 2
     last_row = max(2, last_data_row)
 
-    # Garantir os agrupamentos visuais da linha 1.
-    for merged in list(sheet.merged_cells.ranges):
-        if merged.min_row == 1 and merged.max_row == 1:
-            sheet.unmerge_cells(str(merged))
-    for merge_ref in ("B1:C1", "D1:E1", "F1:G1", "H1:I1", "J1:K1"):
+    # Garantir os agrupamentos visuais da linha 1 (so mexe no que divergir).
+    existing_merges = {
+        merged.coord
+        for merged in sheet.merged_cells.ranges
+        if merged.min_row == 1 and merged.max_row == 1
+    }
+    for merge_ref in existing_merges - _HEADER_MERGES:
+        sheet.unmerge_cells(merge_ref)
+    for merge_ref in _HEADER_MERGES - existing_merges:
         sheet.merge_cells(merge_ref)
 
     for col_name, width in _COLUMN_WIDTHS.items():
@@ -161,7 +255,9 @@ def _apply_visual_style(sheet) -> None:
     sheet.row_dimensions[1].height = 22
     sheet.row_dimensions[2].height = 20
     sheet.freeze_panes = "A3"
-    sheet.auto_filter.ref = f"{_FIRST_COLUMN}2:{_LOG_COLUMN}{last_row}"
+    filter_ref = f"{_FIRST_COLUMN}2:{_LOG_COLUMN}{last_row}"
+    if sheet.auto_filter.ref != filter_ref:
+        sheet.auto_filter.ref = filter_ref
 
     for col_index in range(1, _LAST_COLUMN_INDEX + 1):
         top_cell = sheet.cell(row=1, column=col_index)
@@ -176,10 +272,20 @@ def _apply_visual_style(sheet) -> None:
         header_cell.alignment = _ALIGN_CENTER
         header_cell.border = _CELL_BORDER
 
-    for row in range(3, last_row + 1):
-        row_fill = _ROW_EVEN_FILL if row % 2 == 0 else _ROW_ODD_FILL
-        for col_index in range(1, _LAST_COLUMN_INDEX + 1):
-            cell = sheet.cell(row=row, column=col_index)
+    # Atribuir estilo e caro no openpyxl (cada objeto e comparado com a tabela
+    # do workbook). So a primeira linha par/impar recebe os objetos; as demais
+    # copiam os ids dela, e apenas nas celulas que estiverem diferentes.
+    styled_keys: dict[int, list[tuple[int, int, int, int]]] = {}
+    for cells in sheet.iter_rows(min_row=3, max_row=last_row, max_col=_LAST_COLUMN_INDEX):
+        parity = cells[0].row % 2
+        expected = styled_keys.get(parity)
+        if expected is not None:
+            for cell, key in zip(cells, expected):
+                if _body_style_key(cell) != key:
+                    _set_body_style_key(cell, key)
+            continue
+        row_fill = _ROW_EVEN_FILL if parity == 0 else _ROW_ODD_FILL
+        for col_index, cell in enumerate(cells, start=1):
             cell.fill = row_fill
             cell.font = _BODY_FONT
             cell.border = _CELL_BORDER
@@ -189,6 +295,23 @@ def _apply_visual_style(sheet) -> None:
                 cell.alignment = _ALIGN_LEFT
             else:
                 cell.alignment = _ALIGN_RIGHT
+        styled_keys[parity] = [_body_style_key(cell) for cell in cells]
+
+
+def _body_style_key(cell) -> tuple[int, int, int, int]:
+    # Ids de fonte/preenchimento/borda/alinhamento na tabela de estilos do
+    # workbook (o formato numerico fica de fora: varia por coluna e valor).
+    style = cell._style
+    if style is None:
+        return 0, 0, 0, 0
+    return style.fontId, style.fillId, style.borderId, style.alignmentId
+
+
+def _set_body_style_key(cell, key: tuple[int, int, int, int]) -> None:
+    if cell._style is None:
+        cell._style = StyleArray()
+    style = cell._style
+    style.fontId, style.fillId, style.borderId, style.alignmentId = key
 
 
 def _find_previous_non_blank_value(
@@ -196,10 +319,11 @@ def _find_previous_non_blank_value(
     start_row: int,
     column_index: int,
 ) -> object | None:
-    for row in range(start_row - 1, 2, -1):
-        if not _coerce_date(sheet.cell(row=row, column=1).value):
-            continue
-        value = sheet.cell(row=row, column=column_index).value
+    # Sobe so pelas linhas com data do indice da coluna A; em geral o valor
+    # esta na linha anterior e a busca para na primeira leitura.
+    date_rows = _scan_column_a(sheet).date_rows
+    for position in range(bisect_left(date_rows, start_row) - 1, -1, -1):
+        value = sheet.cell(row=date_rows[position], column=column_index).value
         if not _is_blank(value):
             return value
     return None
@@ -226,23 +350,101 @@ def _repeat_previous_value_if_blank(
     return True
 
 
-def _load_and_save_workbook(
-    path: Path,
-    apply_updates: Callable[[object], object],
-) -> object:
-    workbook = load_workbook(path)
+@contextmanager
+def xlsx_session(path: str | Path) -> Iterator[object]:
+    """Abre o XLSX uma vez e entrega a aba ativa; salva uma unica vez ao sair.
+
+    A aba pode ser passada no lugar do caminho para os `update_xlsx_*`,
+    agrupando varias atualizacoes em uma so gravacao.
+    """
+    target = Path(path)
+    if not target.exists():
+        raise FileNotFoundError(target)
+
+    # A escrita segue no openpyxl: o xlsxwriter so cria arquivos novos e um
+    # patch direto no XML teria de refazer estilos, formatos e o filtro.
+    workbook = _take_cached_workbook(target) or load_workbook(target)
     try:
         sheet = workbook.active
         _ensure_layout(sheet)
-        result = apply_updates(sheet)
-        _normalize_interest_number_formats(sheet)
+        yield sheet
         _apply_visual_style(sheet)
-        workbook.save(path)
-        return result
-    finally:
-        close = getattr(workbook, "close", None)
-        if callable(close):
-            close()
+        _save_workbook(workbook, target)
+    except BaseException:
+        workbook.close()
+        raise
+    _store_cached_workbook(target, workbook)
+
+
+def _save_workbook(workbook, target: Path) -> None:
+    # Igual ao `Workbook.save`, mas com deflate nivel 1: o zip do XLSX e boa
+    # parte do tempo de gravacao e o arquivo fica so um pouco maior.
+    archive = ZipFile(
+        target,
+        "w",
+        ZIP_DEFLATED,
+        allowZip64=True,
+        compresslevel=_XLSX_COMPRESSLEVEL,
+    )
+    try:
+        workbook.properties.modified = datetime.now(timezone.utc).replace(tzinfo=None)
+        ExcelWriter(workbook, archive).save()
+    except BaseException:
+        archive.close()
+        raise
+
+
+def _file_signature(target: Path) -> tuple[object, ...]:
+    # `copy2`, sync de rede ou backup restaurado podem manter tamanho e mtime
+    # (e, no Windows, inode/ctime); o digest do conteudo pega esses casos.
+    stat = target.stat()
+    with target.open("rb") as handle:
+        digest = hashlib.file_digest(handle, "blake2b").digest()
+    return (
+        stat.st_size,
+        stat.st_mtime_ns,
+        stat.st_ino,
+        stat.st_ctime_ns,
+        digest,
+    )
+
+
+def _take_cached_workbook(target: Path) -> object | None:
+    """Reaproveita o workbook salvo por este processo se o arquivo nao mudou."""
+    with _workbook_cache_lock:
+        entry = _WORKBOOK_CACHE.pop(target.resolve(), None)
+    if entry is None:
+        return None
+    workbook, signature = entry
+    try:
+        current = _file_signature(target)
+    except OSError:
+        return None
+    if current != signature:
+        return None
+    return workbook
+
+
+def _store_cached_workbook(target: Path, workbook: object) -> None:
+    try:
+        signature = _file_signature(target)
+    except OSError:
+        return
+    with _workbook_cache_lock:
+        _WORKBOOK_CACHE[target.resolve()] = (workbook, signature)
+        while len(_WORKBOOK_CACHE) > _WORKBOOK_CACHE_SIZE:
+            _WORKBOOK_CACHE.pop(next(iter(_WORKBOOK_CACHE)))
+
+
+def _load_and_save_workbook(
+    target: str | Path | object,
+    apply_updates: Callable[[object], object],
+) -> object:
+    if not isinstance(target, (str, Path)):
+        # Aba ja aberta por `xlsx_session`: a gravacao fica para a sessao.
+        return apply_updates(target)
+    with xlsx_session(target) as sheet:
+        return apply_updates(sheet)
 
 
 def _coerce_date(value: object) -> date | None:
@@ -251,21 +453,28 @@ def _coerce_date(value: object) -> date | None:
     if isinstance(value, date):
         return value
     if isinstance(value, str):
-        text = value.strip()
-        for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
-            try:
-                return datetime.strptime(text, fmt).date()
-            except ValueError:
-                continue
+        return _parse_date_str(value.strip())
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(text: str) -> date | None:
+    # Caminho rapido para dd/mm/aaaa (formato dominante) sem strptime.
+    if is_br_date(text):
+        try:
+            return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+        except ValueError:
+            return None
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
     return None
 
 
 def _as_local_date(value: datetime) -> date:
-    if value.tzinfo is None:
-        localized = value.replace(tzinfo=_LOCAL_TZ)
-    else:
-        localized = value.astimezone(_LOCAL_TZ)
-    return localized.date()
+    return _as_local_datetime(value).date()
 
 
 def _as_local_datetime(value: datetime) -> datetime:
@@ -274,71 +483,105 @@ def _as_local_datetime(value: datetime) -> datetime:
     return value.astimezone(_LOCAL_TZ)
 
 
+@dataclass
+class _DateRowIndex:
+    rows_by_date: dict[date, int]
+    date_rows: list[int]
+
+    @property
+    def last_date_row(self) -> int | None:
+        return self.date_rows[-1] if self.date_rows else None
+
+
+# Indice da coluna A por planilha, montado em uma unica varredura e
+# atualizado quando uma linha e criada.
+_DATE_ROW_INDEX: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def _scan_column_a(sheet) -> _DateRowIndex:
+    index = _DATE_ROW_INDEX.get(sheet)
+    if index is not None:
+        return index
+
+    index = _DateRowIndex(rows_by_date={}, date_rows=[])
+    for row, (value,) in enumerate(
+        sheet.iter_rows(min_row=3, max_col=1, values_only=True),
+        start=3,
+    ):
+        cell_date = _coerce_date(value)
+        if cell_date is None:
+            continue
+        index.rows_by_date.setdefault(cell_date, row)
+        index.date_rows.append(row)
+    _DATE_ROW_INDEX[sheet] = index
+    return index
+
+
 def _find_row_by_date(sheet, target_date: date) -> int | None:
-    for row in range(3, sheet.max_row + 1):
-        cell_value = sheet.cell(row=row, column=1).value
-        cell_date = _coerce_date(cell_value)
-        if cell_date == target_date:
-            return row
-    return None
+    return _scan_column_a(sheet).rows_by_date.get(target_date)
 
 
 def _find_last_date_row(sheet) -> int | None:
-    last_date_row = None
-    for row in range(3, sheet.max_row + 1):
-        if _coerce_date(sheet.cell(row=row, column=1).value):
-            last_date_row = row
-    return last_date_row
+    return _scan_column_a(sheet).last_date_row
 
 
-def _find_or_create_row_by_date(sheet, target_date: date) -> int:
-    row = _find_row_by_date(sheet, target_date)
+def _find_or_create_row_by_date(sheet, target_date: date) -> tuple[int, bool]:
+    """Retorna a linha da data e se ela foi criada agora."""
+    index = _scan_column_a(sheet)
+    row = index.rows_by_date.get(target_date)
     if row is not None:
-        return row
-    last_date_row = _find_last_date_row(sheet)
-    row = (last_date_row or 2) + 1
-    sheet[f"A{row}"] = target_date
-    sheet[f"A{row}"].number_format = _DATE_NUMBER_FORMAT
-    return row
+        return row, False
+    row = (index.last_date_row or 2) + 1
+    date_cell = sheet.cell(row=row, column=1, value=target_date)
+    date_cell.number_format = _DATE_NUMBER_FORMAT
+    index.rows_by_date[target_date] = row
+    index.date_rows.append(row)
+    return row, True
 
 
 def _normalize_interest_number_formats(sheet) -> None:
-    last_row = _find_last_date_row(sheet)
-    if last_row is None:
+    date_rows = _scan_column_a(sheet).date_rows
+    if not date_rows:
         return
-
-    for row in range(3, last_row + 1):
-        if not _coerce_date(sheet.cell(row=row, column=1).value):
+    dated = set(date_rows)
+    for cells in sheet.iter_rows(
+        min_row=date_rows[0],
+        max_row=date_rows[-1],
+        max_col=_CDI_COLUMN_INDEX,
+    ):
+        if cells[0].row not in dated:
             continue
+        for column_index, number_format in _COLUMN_NUMBER_FORMATS:
+            cell = cells[column_index - 1]
+            if not _is_blank(cell.value) and cell.number_format != number_format:
+                cell.number_format = number_format
 
-        date_cell = sheet.cell(row=row, column=1)
-        if date_cell.number_format != _DATE_NUMBER_FORMAT:
-            date_cell.number_format = _DATE_NUMBER_FORMAT
-
-        tjlp_cell = sheet.cell(row=row, column=12)
-        if not _is_blank(tjlp_cell.value) and tjlp_cell.number_format != _PERCENT_NUMBER_FORMAT:
-            tjlp_cell.number_format = _PERCENT_NUMBER_FORMAT
-
-        selic_cell = sheet.cell(row=row, column=13)
-        if (
-            not _is_blank(selic_cell.value)
-            and selic_cell.number_format != _PERCENT_NUMBER_FORMAT
-        ):
-            selic_cell.number_format = _PERCENT_NUMBER_FORMAT
 
-        cdi_cell = sheet.cell(row=row, column=14)
-        if not _is_blank(cdi_cell.value) and cdi_cell.number_format != _CDI_NUMBER_FORMAT:
-            cdi_cell.number_format = _CDI_NUMBER_FORMAT
+def _migrate_legacy_log(values: tuple[object, ...]) -> list[object]:
+    # Mesmo ajuste de `_ensure_layout` (log antigo na coluna L), sem gravar.
+    row_values = list(values) + [None] * (_LOG_COLUMN_INDEX - len(values))
+    old_log = row_values[11]
+    if _looks_like_log(old_log):
+        if _is_blank(row_values[_LOG_COLUMN_INDEX - 1]):
+            row_values[_LOG_COLUMN_INDEX - 1] = str(old_log).strip()
+        row_values[11] = None
+    return row_values
 
 
-def _find_last_updated_row(sheet) -> int:
+def _read_last_updated_row(sheet) -> list[object]:
+    """Retorna as colunas A..O da ultima linha com log (ou com data)."""
     last_logged = None
     last_date = None
-    for row in range(3, sheet.max_row + 1):
-        if _coerce_date(sheet.cell(row=row, column=1).value):
-            last_date = row
-        if sheet.cell(row=row, column=_LOG_COLUMN_INDEX).value:
-            last_logged = row
+    for values in sheet.iter_rows(
+        min_row=3,
+        max_col=_LOG_COLUMN_INDEX,
+        values_only=True,
+    ):
+        row_values = _migrate_legacy_log(values)
+        if _coerce_date(row_values[0]):
+            last_date = row_values
+        if row_values[_LOG_COLUMN_INDEX - 1]:
+            last_logged = row_values
     if last_logged is not None:
         return last_logged
     if last_date is not None:
@@ -346,25 +589,52 @@ def _find_last_updated_row(sheet) -> int:
     raise ValueError("nenhuma linha com data encontrada na planilha")
 
 
+def _format_timestamp(when: datetime) -> str:
+    # Equivale a strftime("%d/%m/%Y %H:%M:%S"), sem interpretar o formato.
+    return (
+        f"{when.day:02d}/{when.month:02d}/{when.year:04d} "
+        f"{when.hour:02d}:{when.minute:02d}:{when.second:02d}"
+    )
+
+
+def _build_log_value(
+    status: str,
+    detail: str | None,
+    logged_at: datetime | None,
+) -> str:
+    when = _as_local_datetime(logged_at) if logged_at else datetime.now(_LOCAL_TZ)
+    timestamp = _format_timestamp(when)
+    status_text = (status or "OK").strip()
+    if detail:
+        detail_text = _WS_RE.sub(" ", str(detail)).strip()
+        return f"{status_text} {timestamp} - {detail_text}"
+    return f"{status_text} {timestamp}"
+
+
 def _format_date_cell(value: object) -> str:
     cell_date = _coerce_date(value)
     if cell_date:
-        return cell_date.strftime("%d/%m/%Y")
+        return f"{cell_date.day:02d}/{cell_date.month:02d}/{cell_date.year:04d}"
     return ""
 
 
 def _to_decimal(value: object) -> Decimal | None:
+    if type(value) is Decimal:
+        return value
+    if type(value) is int:
+        return Decimal(value)
     if value is None:
         return None
     if isinstance(value, Decimal):
         return value
     if isinstance(value, (int, float)):
+        # float via str: Decimal(float) traria a expansao binaria inteira.
         return Decimal(str(value))
     if isinstance(value, str):
         text = value.strip()
         if not text:
             return None
-        cleaned = re.sub(r"[^\d,.-]", "", text)
+        cleaned = _NUM_CLEAN_RE.sub("", text)
         if "," in cleaned:
             cleaned = cleaned.replace(".", "").replace(",", ".")
         return Decimal(cleaned)
@@ -375,8 +645,7 @@ def _format_number_cell(value: object) -> str:
     number = _to_decimal(value)
     if number is None:
         return ""
-    formatted = _quantize_4(number)
-    return f"{formatted:.4f}".replace(".", ",")
+    return f"{_quantize_4(number):.4f}".replace(".", ",")
 
 
 def _format_percent_cell(value: object) -> str:
@@ -386,55 +655,52 @@ def _format_percent_cell(value: object) -> str:
     # Compatibilidade: em planilhas novas o valor fica fracionario (0,0919),
     # em planilhas antigas pode aparecer em pontos percentuais (9,19).
     normalized = number if abs(number) > 1 else number * Decimal("100")
-    formatted = _quantize_4(normalized)
-    return f"{formatted:.4f}".replace(".", ",") + "%"
+    return f"{_quantize_4(normalized):.4f}%".replace(".", ",")
 
 
 def _format_cdi_cell(value: object) -> str:
     number = _to_decimal(value)
     if number is None:
         return ""
-    formatted = _quantize_10(number)
-    return f"{formatted:.10f}".replace(".", ",")
+    return f"{_quantize_10(number):.10f}".replace(".", ",")
 
 
 def _format_log_cell(value: object) -> str:
     if value is None:
         return ""
     if isinstance(value, datetime):
-        return f"OK {value.strftime('%d/%m/%Y %H:%M:%S')}"
+        return f"OK {_format_timestamp(value)}"
     return str(value).strip()
 
 
 def update_xlsx_usd_brl(
-    path: str | Path,
+    path: str | Path | object,
     quote: Quote,
     spread: Decimal = Decimal("0.0020"),
     *,
     target_date: date | None = None,
     overwrite: bool = True,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
     def _apply(sheet) -> None:
         collected_date = target_date or _as_local_date(quote.collected_at)
         compra = _quantize_4(quote.value)
 
-        row = _find_or_create_row_by_date(sheet, collected_date)
-        _set_cell(
-            sheet,
-            f"A{row}",
-            collected_date,
-            number_format=_DATE_NUMBER_FORMAT,
-            overwrite=True,
-        )
-        buy_address = f"B{row}"
-        existing_buy = sheet[buy_address].value
+        row, created = _find_or_create_row_by_date(sheet, collected_date)
+        if not created and isinstance(sheet.cell(row=row, column=1).value, str):
+            # Data antiga gravada como texto: regrava como data.
+            _set_cell(
+                sheet,
+                row,
+                1,
+                collected_date,
+                number_format=_DATE_NUMBER_FORMAT,
+                overwrite=True,
+            )
+        existing_buy = sheet.cell(row=row, column=2).value
         wrote_buy = _set_cell(
             sheet,
-            buy_address,
+            row,
+            2,
             compra,
             number_format=_QUOTE_NUMBER_FORMAT,
             overwrite=overwrite,
@@ -451,190 +717,95 @@ def update_xlsx_usd_brl(
         venda = _quantize_4(buy_for_sale + spread)
         _set_cell(
             sheet,
-            f"C{row}",
+            row,
+            3,
             venda,
             number_format=_QUOTE_NUMBER_FORMAT,
             overwrite=overwrite,
         )
 
-    _load_and_save_workbook(target, _apply)
+    _load_and_save_workbook(path, _apply)
 
 
-def update_xlsx_dolar_turismo(
-    path: str | Path,
-    quote: BidAskQuote,
-    target_date: date | None = None,
+def _update_bid_ask(
+    path: str | Path | object,
+    quote: PtaxQuote | BidAskQuote,
+    target_date: date | None,
+    source: str,
     *,
-    overwrite: bool = True,
+    overwrite: bool,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
+    use_date = target_date or _as_local_date(quote.collected_at)
+    buy_column, sell_column = _BID_ASK_COLUMNS[source]
 
     def _apply(sheet) -> None:
-        use_date = target_date or _as_local_date(quote.collected_at)
-        row = _find_or_create_row_by_date(sheet, use_date)
+        row, _ = _find_or_create_row_by_date(sheet, use_date)
+        _write_bid_ask(sheet, row, buy_column, sell_column, quote, overwrite=overwrite)
 
-        compra = _quantize_4(quote.buy)
-        venda = _quantize_4(quote.sell)
+    _load_and_save_workbook(path, _apply)
 
-        _set_cell(
-            sheet,
-            f"F{row}",
-            compra,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-        _set_cell(
-            sheet,
-            f"G{row}",
-            venda,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
 
-    _load_and_save_workbook(target, _apply)
+def update_xlsx_dolar_turismo(
+    path: str | Path | object,
+    quote: BidAskQuote,
+    target_date: date | None = None,
+    *,
+    overwrite: bool = True,
+) -> None:
+    _update_bid_ask(path, quote, target_date, "turismo", overwrite=overwrite)
 
 
 def update_xlsx_dolar_ptax(
-    path: str | Path,
+    path: str | Path | object,
     quote: PtaxQuote,
     target_date: date | None = None,
     *,
     overwrite: bool = True,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
-    def _apply(sheet) -> None:
-        use_date = target_date or _as_local_date(quote.collected_at)
-        row = _find_or_create_row_by_date(sheet, use_date)
-
-        compra = _quantize_4(quote.buy)
-        venda = _quantize_4(quote.sell)
-
-        _set_cell(
-            sheet,
-            f"D{row}",
-            compra,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-        _set_cell(
-            sheet,
-            f"E{row}",
-            venda,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-
-    _load_and_save_workbook(target, _apply)
+    _update_bid_ask(path, quote, target_date, "ptax_usd", overwrite=overwrite)
 
 
 def update_xlsx_euro_ptax(
-    path: str | Path,
+    path: str | Path | object,
     quote: PtaxQuote,
     target_date: date | None = None,
     *,
     overwrite: bool = True,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
-    def _apply(sheet) -> None:
-        use_date = target_date or _as_local_date(quote.collected_at)
-        row = _find_or_create_row_by_date(sheet, use_date)
-
-        compra = _quantize_4(quote.buy)
-        venda = _quantize_4(quote.sell)
-
-        _set_cell(
-            sheet,
-            f"H{row}",
-            compra,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-        _set_cell(
-            sheet,
-            f"I{row}",
-            venda,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-
-    _load_and_save_workbook(target, _apply)
+    _update_bid_ask(path, quote, target_date, "ptax_eur", overwrite=overwrite)
 
 
 def update_xlsx_chf_ptax(
-    path: str | Path,
+    path: str | Path | object,
     quote: PtaxQuote,
     target_date: date | None = None,
     *,
     overwrite: bool = True,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
-    def _apply(sheet) -> None:
-        use_date = target_date or _as_local_date(quote.collected_at)
-        row = _find_or_create_row_by_date(sheet, use_date)
-
-        compra = _quantize_4(quote.buy)
-        venda = _quantize_4(quote.sell)
-
-        _set_cell(
-            sheet,
-            f"J{row}",
-            compra,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-        _set_cell(
-            sheet,
-            f"K{row}",
-            venda,
-            number_format=_QUOTE_NUMBER_FORMAT,
-            overwrite=overwrite,
-        )
-
-    _load_and_save_workbook(target, _apply)
+    _update_bid_ask(path, quote, target_date, "ptax_chf", overwrite=overwrite)
 
 
 def update_xlsx_log(
-    path: str | Path,
+    path: str | Path | object,
     target_date: date | None = None,
     logged_at: datetime | None = None,
     status: str = "OK",
     detail: str | None = None,
 ) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
     def _apply(sheet) -> None:
-        use_date = target_date or datetime.now(_LOCAL_TZ).date()
-        row = _find_or_create_row_by_date(sheet, use_date)
-
-        when = _as_local_datetime(logged_at) if logged_at else datetime.now(_LOCAL_TZ)
-        timestamp = when.strftime("%d/%m/%Y %H:%M:%S")
-        status_text = (status or "OK").strip()
-        if detail:
-            detail_text = " ".join(str(detail).split())
-            cell_value = f"{status_text} {timestamp} - {detail_text}"
-        else:
-            cell_value = f"{status_text} {timestamp}"
+        # Um unico `now` para a data e o horario do log (mesmo dia na virada).
+        now = None if target_date and logged_at else datetime.now(_LOCAL_TZ)
+        use_date = target_date or now.date()
+        row, _ = _find_or_create_row_by_date(sheet, use_date)
 
-        _set_cell(sheet, f"{_LOG_COLUMN}{row}", cell_value, overwrite=True)
+        cell_value = _build_log_value(status, detail, logged_at or now)
+        _set_cell(sheet, row, _LOG_COLUMN_INDEX, cell_value, overwrite=True)
 
-    _load_and_save_workbook(target, _apply)
+    _load_and_save_workbook(path, _apply)
 
 
 def update_xlsx_quotes_and_log(
-    path: str | Path,
+    path: str | Path | object,
     *,
     target_date: date,
     usd_brl: Quote | None = None,
@@ -656,19 +827,18 @@ def update_xlsx_quotes_and_log(
     Retorna, por fonte, quais campos foram efetivamente gravados
     (por padrao nao sobrescreve celulas ja preenchidas).
     """
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
     def _apply(sheet) -> dict[str, tuple[str, ...]]:
-        row = _find_or_create_row_by_date(sheet, target_date)
-        _set_cell(
-            sheet,
-            f"A{row}",
-            target_date,
-            number_format=_DATE_NUMBER_FORMAT,
-            overwrite=True,
-        )
+        row, created = _find_or_create_row_by_date(sheet, target_date)
+        if not created and isinstance(sheet.cell(row=row, column=1).value, str):
+            # Data antiga gravada como texto: regrava como data.
+            _set_cell(
+                sheet,
+                row,
+                1,
+                target_date,
+                number_format=_DATE_NUMBER_FORMAT,
+                overwrite=True,
+            )
 
         written: dict[str, tuple[str, ...]] = {}
 
@@ -680,11 +850,11 @@ def update_xlsx_quotes_and_log(
         if usd_brl:
             compra = _quantize_4(usd_brl.value)
 
-            buy_address = f"B{row}"
-            existing_buy = sheet[buy_address].value
+            existing_buy = sheet.cell(row=row, column=2).value
             wrote_buy = _set_cell(
                 sheet,
-                buy_address,
+                row,
+                2,
                 compra,
                 number_format=_QUOTE_NUMBER_FORMAT,
                 overwrite=overwrite_quotes,
@@ -704,99 +874,41 @@ def update_xlsx_quotes_and_log(
             venda = _quantize_4(buy_for_sale + spread)
             if _set_cell(
                 sheet,
-                f"C{row}",
+                row,
+                3,
                 venda,
                 number_format=_QUOTE_NUMBER_FORMAT,
                 overwrite=overwrite_quotes,
             ):
                 _append_written("usd_brl", "venda")
 
-        if ptax_usd:
-            compra = _quantize_4(ptax_usd.buy)
-            venda = _quantize_4(ptax_usd.sell)
-            if _set_cell(
-                sheet,
-                f"D{row}",
-                compra,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("ptax_usd", "compra")
-            if _set_cell(
-                sheet,
-                f"E{row}",
-                venda,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("ptax_usd", "venda")
-
-        if turismo:
-            compra = _quantize_4(turismo.buy)
-            venda = _quantize_4(turismo.sell)
-            if _set_cell(
-                sheet,
-                f"F{row}",
-                compra,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("turismo", "compra")
-            if _set_cell(
-                sheet,
-                f"G{row}",
-                venda,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("turismo", "venda")
-
-        if ptax_eur:
-            compra = _quantize_4(ptax_eur.buy)
-            venda = _quantize_4(ptax_eur.sell)
-            if _set_cell(
-                sheet,
-                f"H{row}",
-                compra,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("ptax_eur", "compra")
-            if _set_cell(
-                sheet,
-                f"I{row}",
-                venda,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("ptax_eur", "venda")
-
-        if ptax_chf:
-            compra = _quantize_4(ptax_chf.buy)
-            venda = _quantize_4(ptax_chf.sell)
-            if _set_cell(
+        bid_ask_quotes = {
+            "ptax_usd": ptax_usd,
+            "turismo": turismo,
+            "ptax_eur": ptax_eur,
+            "ptax_chf": ptax_chf,
+        }
+        for source, (buy_column, sell_column) in _BID_ASK_COLUMNS.items():
+            quote = bid_ask_quotes[source]
+            if not quote:
+                continue
+            for field in _write_bid_ask(
                 sheet,
-                f"J{row}",
-                compra,
-                number_format=_QUOTE_NUMBER_FORMAT,
+                row,
+                buy_column,
+                sell_column,
+                quote,
                 overwrite=overwrite_quotes,
             ):
-                _append_written("ptax_chf", "compra")
-            if _set_cell(
-                sheet,
-                f"K{row}",
-                venda,
-                number_format=_QUOTE_NUMBER_FORMAT,
-                overwrite=overwrite_quotes,
-            ):
-                _append_written("ptax_chf", "venda")
+                _append_written(source, field)
 
         tjlp_percent = _to_decimal(tjlp) if tjlp is not None else None
         if tjlp_percent is not None:
             tjlp_fraction = _quantize_4(tjlp_percent / Decimal("100"))
             if _set_cell(
                 sheet,
-                f"{_TJLP_COLUMN}{row}",
+                row,
+                _TJLP_COLUMN_INDEX,
                 tjlp_fraction,
                 number_format=_PERCENT_NUMBER_FORMAT,
                 overwrite=overwrite_quotes,
@@ -808,7 +920,8 @@ def update_xlsx_quotes_and_log(
             selic_fraction = _quantize_4(selic_percent / Decimal("100"))
             if _set_cell(
                 sheet,
-                f"{_SELIC_COLUMN}{row}",
+                row,
+                _SELIC_COLUMN_INDEX,
                 selic_fraction,
                 number_format=_PERCENT_NUMBER_FORMAT,
                 overwrite=overwrite_quotes,
@@ -820,7 +933,8 @@ def update_xlsx_quotes_and_log(
             cdi_value = _quantize_10(cdi_percent)
             if _set_cell(
                 sheet,
-                f"{_CDI_COLUMN}{row}",
+                row,
+                _CDI_COLUMN_INDEX,
                 cdi_value,
                 number_format=_CDI_NUMBER_FORMAT,
                 overwrite=overwrite_quotes,
@@ -831,49 +945,39 @@ def update_xlsx_quotes_and_log(
         if _repeat_previous_value_if_blank(
             sheet,
             row,
-            12,
+            _TJLP_COLUMN_INDEX,
             number_format=_PERCENT_NUMBER_FORMAT,
         ):
             _append_written("tjlp", "valor_repetido")
         if _repeat_previous_value_if_blank(
             sheet,
             row,
-            13,
+            _SELIC_COLUMN_INDEX,
             number_format=_PERCENT_NUMBER_FORMAT,
         ):
             _append_written("selic", "selic_repetido")
         if _repeat_previous_value_if_blank(
             sheet,
             row,
-            14,
+            _CDI_COLUMN_INDEX,
             number_format=_CDI_NUMBER_FORMAT,
         ):
             _append_written("selic", "cdi_repetido")
 
-        when = _as_local_datetime(logged_at) if logged_at else datetime.now(_LOCAL_TZ)
-        timestamp = when.strftime("%d/%m/%Y %H:%M:%S")
-        status_text = (status or "OK").strip()
-        if detail:
-            detail_text = " ".join(str(detail).split())
-            cell_value = f"{status_text} {timestamp} - {detail_text}"
-        else:
-            cell_value = f"{status_text} {timestamp}"
-
-        _set_cell(sheet, f"{_LOG_COLUMN}{row}", cell_value, overwrite=True)
+        cell_value = _build_log_value(status, detail, logged_at)
+        _set_cell(sheet, row, _LOG_COLUMN_INDEX, cell_value, overwrite=True)
         return written
 
-    return _load_and_save_workbook(target, _apply)
+    return _load_and_save_workbook(path, _apply)
 
 
 def normalize_xlsx_layout(path: str | Path) -> None:
-    target = Path(path)
-    if not target.exists():
-        raise FileNotFoundError(target)
-
-    def _apply(_sheet) -> None:
-        return None
+    # Os `update_xlsx_*` ja gravam com o formato certo; a varredura dos
+    # formatos de data/juros das linhas antigas fica so aqui.
+    def _apply(sheet) -> None:
+        _normalize_interest_number_formats(sheet)
 
-    _load_and_save_workbook(target, _apply)
+    _load_and_save_workbook(path, _apply)
 
 
 def update_csv_from_xlsx(
@@ -884,16 +988,15 @@ def update_csv_from_xlsx(
     if not source.exists():
         raise FileNotFoundError(source)
 
-    workbook = load_workbook(source, data_only=True)
+    # Somente leitura: o openpyxl le a aba em streaming, sem montar estilos.
+    workbook = load_workbook(source, read_only=True, data_only=True)
     try:
         sheet = workbook.active
-        _ensure_layout(sheet)
-        row = _find_last_updated_row(sheet)
-        row_values = [sheet.cell(row=row, column=col).value for col in range(1, 16)]
+        # A dimensao gravada pode estar errada (ex.: A1:A1) e cortar as linhas.
+        sheet.reset_dimensions()
+        row_values = _read_last_updated_row(sheet)
     finally:
-        close = getattr(workbook, "close", None)
-        if callable(close):
-            close()
+        workbook.close()
 
     date_value = _format_date_cell(row_values[0])
     if not date_value:
@@ -908,36 +1011,130 @@ def update_csv_from_xlsx(
     data_row.append(_format_log_cell(row_values[14]))
 
     target = Path(csv_path)
-    existing_rows: list[list[str]] = []
-    if target.exists():
-        for encoding in ("utf-8", "latin-1"):
-            try:
-                with target.open("r", encoding=encoding, newline="") as handle:
-                    reader = csv.reader(handle, delimiter=";")
-                    existing_rows = list(reader)
-                break
-            except UnicodeDecodeError:
-                existing_rows = []
-                continue
+    if _patch_csv_in_place(target, date_value, data_row):
+        return
 
-    data_rows = [
-        row_values
-        for row_values in existing_rows
-        if row_values and _DATE_PATTERN.match(row_values[0])
-    ]
+    existing_rows = _iter_csv_rows(target) if target.exists() else iter(())
+    offsets: dict[str, list[int]] = {}
+    # Grava em arquivo temporario e troca no fim: o CSV nunca fica pela metade.
+    temp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open("wb", buffering=_CSV_WRITE_BUFFER) as handle:
+            handle.write(_encode_csv_row(_DEFAULT_CSV_HEADER))
+            for row_values in _merge_csv_rows(existing_rows, date_value, data_row):
+                line = _encode_csv_row(row_values)
+                # Datas repetidas ficam sem indice valido (forcam a regravacao).
+                offsets[row_values[0]] = (
+                    [-1, -1] if row_values[0] in offsets else [handle.tell(), len(line)]
+                )
+                handle.write(line)
+        os.replace(temp_path, target)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    _save_csv_index(target, offsets)
+
+
+def _iter_csv_rows(target: Path) -> Iterator[list[str]]:
+    # Uma leitura so: decodifica os bytes em UTF-8 (com ou sem BOM) e, se
+    # falhar, em latin-1 (CSVs antigos), sem reabrir o arquivo.
+    raw = target.read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    return csv.reader(io.StringIO(text, newline=""), delimiter=";")
+
+
+def _merge_csv_rows(
+    existing_rows: Iterable[list[str]],
+    date_value: str,
+    data_row: list[str],
+) -> Iterator[list[str]]:
+    """Gera as linhas de dados do CSV trocando (ou acrescentando) a da data."""
     replaced = False
-    new_data_rows: list[list[str]] = []
-    for row_values in data_rows:
+    for row_values in existing_rows:
+        if not row_values or not is_br_date(row_values[0]):
+            continue
         if row_values[0] == date_value:
-            new_data_rows.append(data_row)
             replaced = True
+            yield data_row
         else:
-            new_data_rows.append(row_values)
+            yield row_values
     if not replaced:
-        new_data_rows.append(data_row)
+        yield data_row
+
+
+def _encode_csv_row(row_values: list[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=";", quoting=csv.QUOTE_MINIMAL).writerow(row_values)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_index_path(target: Path) -> Path:
+    key = hashlib.sha1(str(target.resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(CSV_INDEX_DIR).expanduser() / f"{key}.json"
 
-    rows = [_DEFAULT_CSV_HEADER] + new_data_rows
 
-    with target.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.writer(handle, delimiter=";", quoting=csv.QUOTE_MINIMAL)
-        writer.writerows(rows)
+def _load_csv_index(target: Path) -> dict[str, list[int]] | None:
+    # O indice so vale se o CSV nao mudou desde a ultima gravacao nossa.
+    try:
+        stat = target.stat()
+        with _csv_index_path(target).open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("size") != stat.st_size
+        or data.get("mtime_ns") != stat.st_mtime_ns
+        or not isinstance(data.get("offsets"), dict)
+    ):
+        return None
+    return data["offsets"]
+
+
+def _save_csv_index(target: Path, offsets: dict[str, list[int]]) -> None:
+    index_path = _csv_index_path(target)
+    try:
+        stat = target.stat()
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(
+                {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "offsets": offsets},
+                handle,
+            )
+        os.replace(temp_path, index_path)
+    except OSError:
+        # Indice e apenas otimizacao; a proxima gravacao regrava o CSV inteiro.
+        return
+
+
+def _patch_csv_in_place(target: Path, date_value: str, data_row: list[str]) -> bool:
+    """Troca (ou acrescenta) so a linha da data, sem reescrever o CSV inteiro.
+
+    Retorna False quando o indice nao serve e o CSV precisa ser regravado.
+    """
+    offsets = _load_csv_index(target)
+    if offsets is None:
+        return False
+    line = _encode_csv_row(data_row)
+    entry = offsets.get(date_value)
+    try:
+        with target.open("r+b") as handle:
+            if entry is None:
+                offset = handle.seek(0, os.SEEK_END)
+            else:
+                offset, length = entry
+                if length != len(line):
+                    return False
+                handle.seek(offset)
+                if not handle.read(length).startswith(date_value.encode("utf-8")):
+                    return False
+                handle.seek(offset)
+            handle.write(line)
+    except OSError:
+        return False
+    offsets[date_value] = [offset, len(line)]
+    _save_csv_index(target, offsets)
+    return True
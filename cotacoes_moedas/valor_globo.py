@@ -1,24 +1,69 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from decimal import Decimal
+from http.client import HTTPException
 import re
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
-from .parsing import ParseDecimalError, parse_pt_br_decimal
+from .parsing import ParseDecimalError, html_table_rows, parse_pt_br_decimal
 from .page_consistency import (
     PageCheck,
     PageConsistencyError,
     ensure_page_consistency,
 )
-from .playwright_utils import chromium_page, proxy_from_env
+from .playwright_utils import (
+    DEFAULT_BLOCKED_RESOURCES,
+    DEFAULT_USER_AGENT,
+    NAVIGATION_TIMEOUT_MS,
+    chromium_page,
+    close_shared_browser,
+    proxy_from_env,
+)
 
 
 VALOR_GLOBO_URL = "https://valor.globo.com/"
-ROW_LABEL_RE = re.compile(r"D.lar Turismo", re.IGNORECASE)
+# Rotulo na primeira `td` da linha (compra e venda vem nas duas seguintes).
+ROW_LABEL_RE = re.compile(r"D.lar Turismo\b", re.IGNORECASE)
 _HAS_DIGIT = re.compile(r"\d")
+# A home do Valor carrega varios scripts de anuncio/metricas que so atrasam
+# a tabela.
+_VALOR_BLOCKED_RESOURCES = DEFAULT_BLOCKED_RESOURCES | {"tracker"}
+# Devolve o texto das `td` da linha de Dolar Turismo (mesma regra de
+# `ROW_LABEL_RE`) quando compra e venda ja tem digitos; `null` mantem o
+# `wait_for_function` esperando enquanto a tabela ainda mostra "-" ou vazio.
+_TURISMO_ROW_SCRIPT = """() => {
+  for (const row of document.querySelectorAll("tr")) {
+    const cells = row.querySelectorAll("td");
+    if (!cells.length || !/^\\s*D.lar Turismo\\b/i.test(cells[0].textContent || "")) {
+      continue;
+    }
+    const texts = Array.from(cells, (cell) =>
+      (cell.innerText || "").replace(/\\s+/g, " ").trim()
+    );
+    if (texts.length < 3 || !/\\d/.test(texts[1]) || !/\\d/.test(texts[2])) {
+      return null;
+    }
+    return texts;
+  }
+  return null;
+}"""
+# Intervalo fixo em vez de `raf`: evita varrer as linhas a cada frame.
+_ROW_POLLING_MS = 100
+TURISMO_MAX_AGE_SECONDS = 30
+TURISMO_STALE_SECONDS = 300
+_cache_lock = threading.Lock()
+# Ultima home do Valor com validadores: (cabecalhos condicionais, HTML).
+_last_valor_page: tuple[dict[str, str], str] | None = None
+_cached_quote: BidAskQuote | None = None
+_refresh_future: Future | None = None
+_refresh_executor: ThreadPoolExecutor | None = None
 
 
 class PriceParseError(RuntimeError):
@@ -35,19 +80,67 @@ class BidAskQuote:
     collected_at: datetime
 
 
-def fetch_dolar_turismo(
-    headless: bool = True,
-    timeout_ms: int = 45000,
-) -> BidAskQuote:
+def _fetch_valor_html(timeout_s: float) -> str:
+    """Baixa a home do Valor sem navegador (proxy de `HTTP(S)_PROXY` via `urllib`).
+
+    Usa GET condicional (ETag/Last-Modified); em 304 devolve o HTML anterior.
+    """
+    global _last_valor_page
+    cached = _last_valor_page
+    headers = {"User-Agent": DEFAULT_USER_AGENT}
+    if cached is not None:
+        headers.update(cached[0])
+    request = Request(VALOR_GLOBO_URL, headers=headers)
+    try:
+        with urlopen(request, timeout=timeout_s) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            html = response.read().decode(charset, errors="replace")
+            validators = {
+                name: value
+                for name, value in (
+                    ("If-None-Match", response.headers.get("ETag")),
+                    ("If-Modified-Since", response.headers.get("Last-Modified")),
+                )
+                if value
+            }
+    except HTTPError as exc:
+        if exc.code == 304 and cached is not None:
+            return cached[1]
+        raise
+    _last_valor_page = (validators, html) if validators else None
+    return html
+
+
+def _read_turismo_http(timeout_ms: int) -> tuple[str, str] | None:
+    """Le compra/venda do HTML servido; `None` indica que o Playwright deve assumir."""
+    try:
+        html = _fetch_valor_html(min(timeout_ms, NAVIGATION_TIMEOUT_MS) / 1000)
+    except (OSError, ValueError, HTTPException):
+        return None
+    for cells in html_table_rows(html):
+        if len(cells) < 3 or not ROW_LABEL_RE.match(cells[0]):
+            continue
+        buy_raw, sell_raw = cells[1], cells[2]
+        if _HAS_DIGIT.search(buy_raw) and _HAS_DIGIT.search(sell_raw):
+            return buy_raw, sell_raw
+        return None
+    return None
+
+
+def _read_turismo_browser(headless: bool, timeout_ms: int) -> tuple[str, str]:
     proxy = proxy_from_env()
-    buy_raw = ""
-    sell_raw = ""
     try:
-        with chromium_page(headless=headless, proxy=proxy) as page:
+        with chromium_page(
+            headless=headless,
+            proxy=proxy,
+            block_resources=_VALOR_BLOCKED_RESOURCES,
+        ) as page:
             page.goto(VALOR_GLOBO_URL, wait_until="commit", timeout=timeout_ms)
 
-            row = page.locator("tr", has_text=ROW_LABEL_RE).first
-            row.wait_for(state="visible", timeout=timeout_ms)
+            # Uma ida ao navegador: espera a linha e ja devolve o texto das celulas.
+            cells = page.wait_for_function(
+                _TURISMO_ROW_SCRIPT, timeout=timeout_ms, polling=_ROW_POLLING_MS
+            ).json_value()
             ensure_page_consistency(
                 page,
                 source="Valor Dolar Turismo",
@@ -59,35 +152,35 @@ def fetch_dolar_turismo(
                             f"url atual: {p.url}",
                         ),
                     ),
-                    PageCheck(
-                        "linha Dolar Turismo",
-                        lambda p: (
-                            p.locator("tr", has_text=ROW_LABEL_RE).count() > 0,
-                            "linha de Dolar Turismo nao encontrada",
-                        ),
-                    ),
                 ],
             )
-
-            cells = row.locator("td")
-            if cells.count() < 3:
-                raise PriceParseError("linha de Dolar Turismo incompleta")
-
-            buy_raw = cells.nth(1).inner_text().strip()
-            sell_raw = cells.nth(2).inner_text().strip()
     except PlaywrightTimeoutError as exc:
         raise PriceParseError("timeout ao buscar Dolar Turismo") from exc
     except PageConsistencyError as exc:
         raise PriceParseError(str(exc)) from exc
 
-    if not buy_raw or not sell_raw or not _HAS_DIGIT.search(buy_raw) or not _HAS_DIGIT.search(sell_raw):
+    if len(cells) < 3:
+        raise PriceParseError("linha de Dolar Turismo incompleta")
+    return cells[1], cells[2]
+
+
+def fetch_dolar_turismo(
+    headless: bool = True,
+    timeout_ms: int = 45000,
+) -> BidAskQuote:
+    # A tabela de cotacoes vem no HTML da home; o Chromium so entra se a
+    # leitura direta falhar.
+    buy_raw, sell_raw = _read_turismo_http(timeout_ms) or _read_turismo_browser(
+        headless, timeout_ms
+    )
+    # Momento da leitura, antes da validacao/parse.
+    collected_at = datetime.now(timezone.utc)
+
+    if not _HAS_DIGIT.search(buy_raw) or not _HAS_DIGIT.search(sell_raw):
         raise PriceParseError(
             "cotacao de Dolar Turismo nao atualizada no Valor"
         )
 
-    if not buy_raw or not sell_raw:
-        raise PriceParseError("nao encontrou compra/venda de Dolar Turismo")
-
     try:
         buy = parse_pt_br_decimal(buy_raw)
         sell = parse_pt_br_decimal(sell_raw)
@@ -100,5 +193,64 @@ def fetch_dolar_turismo(
         sell=sell,
         buy_raw=buy_raw,
         sell_raw=sell_raw,
-        collected_at=datetime.now(timezone.utc),
+        collected_at=collected_at,
     )
+
+
+def _quote_age_seconds(quote: BidAskQuote) -> float | None:
+    # So reaproveita cotacoes do mesmo dia local.
+    if quote.collected_at.astimezone().date() != date.today():
+        return None
+    return (datetime.now(timezone.utc) - quote.collected_at).total_seconds()
+
+
+def _refresh_turismo(kwargs: dict[str, object]) -> BidAskQuote:
+    # Roda no worker `turismo-refresh`, que fecha o proprio navegador.
+    global _cached_quote
+    try:
+        quote = fetch_dolar_turismo(**kwargs)
+    finally:
+        close_shared_browser()
+    with _cache_lock:
+        _cached_quote = quote
+    return quote
+
+
+def _refresh_in_flight(kwargs: dict[str, object]) -> Future:
+    """Busca em andamento (ou uma nova): uma coleta por vez, para todos."""
+    global _refresh_executor, _refresh_future
+    with _cache_lock:
+        if _refresh_future is not None and not _refresh_future.done():
+            return _refresh_future
+        if _refresh_executor is None:
+            # Um worker so: o Playwright sync fica preso a thread que o abriu.
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="turismo-refresh"
+            )
+        _refresh_future = _refresh_executor.submit(_refresh_turismo, kwargs)
+        return _refresh_future
+
+
+def fetch_dolar_turismo_cached(
+    headless: bool = True,
+    timeout_ms: int = 45000,
+    *,
+    max_age_seconds: float = TURISMO_MAX_AGE_SECONDS,
+    stale_seconds: float = TURISMO_STALE_SECONDS,
+) -> BidAskQuote:
+    """`fetch_dolar_turismo` com cache em memoria (stale-while-revalidate).
+
+    Ate `max_age_seconds` devolve a ultima cotacao; ate `stale_seconds`
+    devolve a mesma cotacao e atualiza em segundo plano. Depois disso (ou em
+    outro dia) busca de novo e espera. Erros nunca ficam em cache.
+    """
+    kwargs: dict[str, object] = {"headless": headless, "timeout_ms": timeout_ms}
+    with _cache_lock:
+        cached = _cached_quote
+    age = _quote_age_seconds(cached) if cached is not None else None
+    if cached is not None and age is not None and 0 <= age < stale_seconds:
+        if age >= max_age_seconds:
+            _refresh_in_flight(kwargs)
+        return cached
+    # Sem cotacao valida: quem chegar junto espera a mesma coleta.
+    return _refresh_in_flight(kwargs).result()
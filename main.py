@@ -1,15 +1,19 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from decimal import Decimal
+from functools import lru_cache
 import os
 from pathlib import Path
 import shutil
 import sys
+import threading
 import time
-from typing import Callable
+from typing import Callable, Iterator
 
 from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
 
 from cotacoes_moedas import (
     calculate_cdi_daily_percent,
@@ -24,11 +28,14 @@ from cotacoes_moedas import (
     update_csv_from_xlsx,
     update_xlsx_quotes_and_log,
 )
+from cotacoes_moedas.daemon import remote_fetch_fn
 from cotacoes_moedas.network_sync import (
     copiar_pasta_para_rede,
     parse_network_dirs,
 )
 from cotacoes_moedas.network_copy import try_to_unc
+from cotacoes_moedas.parsing import is_br_date
+from cotacoes_moedas.playwright_utils import close_shared_browser
 from cotacoes_moedas.redaction import redact_secrets
 
 _USD_SPREAD = Decimal("0.0020")
@@ -37,6 +44,7 @@ _DEFAULT_NETWORK_COPY_DIR = r"X:\TEMP\_Publico;\\192.168.21.25\users\TEMP\_Publi
 _DEFAULT_NETWORK_DEST_FOLDER = "cotacoes"
 _MORNING_QUOTES_CUTOFF_HM = (8, 30)
 _PTAX_AVAILABLE_FROM_HM = (13, 10)
+_PATH_PROBE_TIMEOUT_S = 2.0
 _SOURCE_REQUIRED_COLUMNS: dict[str, tuple[str, ...]] = {
     "usd_brl": ("B", "C"),
     "ptax_usd": ("D", "E"),
@@ -46,6 +54,12 @@ _SOURCE_REQUIRED_COLUMNS: dict[str, tuple[str, ...]] = {
     "tjlp": ("L",),
     "selic": ("M", "N"),
 }
+# Mesmas colunas como posicoes na tupla de valores da linha (A = 0).
+_SOURCE_REQUIRED_INDEXES: dict[str, tuple[int, ...]] = {
+    key: tuple(column_index_from_string(col) - 1 for col in columns)
+    for key, columns in _SOURCE_REQUIRED_COLUMNS.items()
+}
+_LAST_SOURCE_COLUMN_INDEX = 14
 _SOURCE_LABELS: dict[str, str] = {
     "usd_brl": "USD/BRL (Investing)",
     "ptax_usd": "PTAX USD",
@@ -79,8 +93,7 @@ def _now_local() -> datetime:
 
 
 def _log(message: str) -> None:
-    timestamp = _now_local().strftime("%H:%M:%S")
-    print(f"[{timestamp}] {message}", flush=True)
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
 
 
 def _log_stage(step: int, total: int, message: str) -> None:
@@ -131,12 +144,24 @@ def _run_fetch(
     return result, None, elapsed
 
 
+def _run_fetch_in_worker(
+    label: str,
+    fetch_fn: Callable[[], object],
+) -> tuple[object | None, str | None, float]:
+    # O navegador compartilhado pertence a thread do worker; fecha ao terminar.
+    try:
+        return _run_fetch(label, fetch_fn)
+    finally:
+        close_shared_browser()
+
+
 def _run_fetches(fetch_specs: list[FetchSpec]) -> dict[str, FetchOutcome]:
     outcomes: dict[str, FetchOutcome] = {}
     if not fetch_specs:
         return outcomes
 
-    max_workers = len(fetch_specs)
+    # Mesmo teto padrao do ThreadPoolExecutor (cpu_count + 4).
+    max_workers = min(len(fetch_specs), (os.cpu_count() or 4) + 4)
     env_max_workers = os.environ.get("COTACOES_MAX_WORKERS")
     if env_max_workers:
         try:
@@ -170,7 +195,7 @@ def _run_fetches(fetch_specs: list[FetchSpec]) -> dict[str, FetchOutcome]:
     )
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {
-            executor.submit(_run_fetch, spec.label, spec.fetch_fn): spec
+            executor.submit(_run_fetch_in_worker, spec.label, spec.fetch_fn): spec
             for spec in fetch_specs
         }
         for future in as_completed(futures):
@@ -257,26 +282,47 @@ def _coerce_date(value: object) -> date | None:
     if isinstance(value, date):
         return value
     if isinstance(value, str):
-        text = value.strip()
-        for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
-            try:
-                return datetime.strptime(text, fmt).date()
-            except ValueError:
-                continue
+        return _parse_date_str(value.strip())
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(text: str) -> date | None:
+    # Caminho rapido para dd/mm/aaaa (formato dominante) sem strptime.
+    if is_br_date(text):
+        try:
+            return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+        except ValueError:
+            return None
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
     return None
 
 
-def _find_row_by_date(sheet, target_date: date) -> int | None:
-    for row in range(3, sheet.max_row + 1):
-        cell_date = _coerce_date(sheet.cell(row=row, column=1).value)
-        if cell_date == target_date:
-            return row
+def _find_row_by_date(
+    sheet,
+    target_date: date,
+) -> tuple[int, tuple[object, ...]] | None:
+    """Retorna a linha da data e os valores A..N, em uma unica passada."""
+    for row, values in enumerate(
+        sheet.iter_rows(
+            min_row=3,
+            max_col=_LAST_SOURCE_COLUMN_INDEX,
+            values_only=True,
+        ),
+        start=3,
+    ):
+        if values and _coerce_date(values[0]) == target_date:
+            return row, values
     return None
 
 
-def _is_source_filled(sheet, row: int, columns: tuple[str, ...]) -> bool:
-    for col in columns:
-        value = sheet[f"{col}{row}"].value
+def _is_source_filled(values: tuple[object, ...], indexes: tuple[int, ...]) -> bool:
+    for index in indexes:
+        value = values[index] if index < len(values) else None
         if value is None:
             return False
         if isinstance(value, str) and not value.strip():
@@ -284,21 +330,28 @@ def _is_source_filled(sheet, row: int, columns: tuple[str, ...]) -> bool:
     return True
 
 
-def _read_filled_sources(planilha_path: Path, target_date: date) -> dict[str, bool]:
-    workbook = load_workbook(planilha_path, data_only=True)
+@contextmanager
+def _open_planilha_values(planilha_path: Path) -> Iterator[object]:
+    # Somente leitura: o openpyxl le a aba em streaming, sem montar estilos.
+    workbook = load_workbook(planilha_path, read_only=True, data_only=True)
     try:
         sheet = workbook.active
-        row = _find_row_by_date(sheet, target_date)
-        filled: dict[str, bool] = {}
-        for key, columns in _SOURCE_REQUIRED_COLUMNS.items():
-            filled[key] = (
-                row is not None and _is_source_filled(sheet, row, columns)
-            )
-        return filled
+        # A dimensao gravada no arquivo pode estar errada (ex.: A1:A1); sem ela
+        # o `iter_rows` le ate a ultima linha real.
+        sheet.reset_dimensions()
+        yield sheet
     finally:
-        close = getattr(workbook, "close", None)
-        if callable(close):
-            close()
+        # Fecha o zip na hora: no Windows o handle aberto bloqueia a copia.
+        workbook.close()
+
+
+def _read_filled_sources(planilha_path: Path, target_date: date) -> dict[str, bool]:
+    with _open_planilha_values(planilha_path) as sheet:
+        found = _find_row_by_date(sheet, target_date)
+    filled: dict[str, bool] = {}
+    for key, indexes in _SOURCE_REQUIRED_INDEXES.items():
+        filled[key] = found is not None and _is_source_filled(found[1], indexes)
+    return filled
 
 
 def _skip_outcome(key: str, reason: str) -> FetchOutcome:
@@ -347,6 +400,31 @@ def _network_planilha_candidates(
     return candidates
 
 
+def _probe_paths_exist(paths: list[Path]) -> list[bool]:
+    # Compartilhamento SMB fora do ar pode travar o `exists()` por ~30s; testa
+    # todos em paralelo e trata como ausente quem nao responde no prazo.
+    results = [False] * len(paths)
+
+    def _probe(index: int, path: Path) -> None:
+        try:
+            results[index] = path.exists()
+        except OSError:
+            pass
+
+    threads = [
+        threading.Thread(target=_probe, args=(index, path), daemon=True)
+        for index, path in enumerate(paths)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + _PATH_PROBE_TIMEOUT_S
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return [
+        result and not thread.is_alive() for result, thread in zip(results, threads)
+    ]
+
+
 def _select_reference_planilha_path(
     local_planilha_path: Path,
     *,
@@ -360,8 +438,8 @@ def _select_reference_planilha_path(
         network_dirs,
         network_dest_folder=network_dest_folder,
     )
-    for candidate in candidates:
-        if candidate.exists():
+    for candidate, exists in zip(candidates, _probe_paths_exist(candidates)):
+        if exists:
             return candidate
     if candidates:
         return candidates[0]
@@ -369,7 +447,13 @@ def _select_reference_planilha_path(
 
 
 def _same_path(left: Path, right: Path) -> bool:
-    return str(left).strip().lower() == str(right).strip().lower()
+    try:
+        return os.path.samefile(left, right)
+    except OSError:
+        # Algum dos dois nao existe: compara o caminho normalizado.
+        return os.path.normcase(os.path.abspath(left)) == os.path.normcase(
+            os.path.abspath(right)
+        )
 
 
 def _sync_local_planilhas_from_reference(
@@ -438,35 +522,48 @@ def _validate_planilha_row_consistency(
     if not planilha_path.exists():
         return [f"planilha nao encontrada: {planilha_path}"]
 
-    workbook = load_workbook(planilha_path, data_only=True)
-    try:
-        sheet = workbook.active
-        row = _find_row_by_date(sheet, target_date)
-        if row is None:
-            return [
-                "linha da data nao encontrada: "
-                f"{target_date.strftime('%d/%m/%Y')} em {planilha_path}"
-            ]
-
-        issues: list[str] = []
-        for key, columns in _SOURCE_REQUIRED_COLUMNS.items():
-            outcome = outcomes.get(key)
-            if outcome is None:
-                continue
-            should_be_filled = (
-                outcome.skip_reason == "ja preenchido na data de hoje"
-                or outcome.value is not None
+    with _open_planilha_values(planilha_path) as sheet:
+        found = _find_row_by_date(sheet, target_date)
+    if found is None:
+        return [
+            "linha da data nao encontrada: "
+            f"{target_date.strftime('%d/%m/%Y')} em {planilha_path}"
+        ]
+
+    row, values = found
+    issues: list[str] = []
+    for key, columns in _SOURCE_REQUIRED_COLUMNS.items():
+        outcome = outcomes.get(key)
+        if outcome is None:
+            continue
+        should_be_filled = (
+            outcome.skip_reason == "ja preenchido na data de hoje"
+            or outcome.value is not None
+        )
+        if should_be_filled and not _is_source_filled(
+            values, _SOURCE_REQUIRED_INDEXES[key]
+        ):
+            issues.append(
+                f"{_SOURCE_LABELS[key]}: colunas esperadas "
+                f"{'/'.join(columns)} vazias na linha {row}"
             )
-            if should_be_filled and not _is_source_filled(sheet, row, columns):
-                issues.append(
-                    f"{_SOURCE_LABELS[key]}: colunas esperadas "
-                    f"{'/'.join(columns)} vazias na linha {row}"
-                )
-        return issues
-    finally:
-        close = getattr(workbook, "close", None)
-        if callable(close):
-            close()
+    return issues
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "sim")
+
+
+def _juros_fetch_fn(fetch_fn: Callable[..., object]) -> Callable[[], object]:
+    if not _env_flag("COTACOES_JUROS_REFRESH"):
+        return fetch_fn
+
+    # Ignora o cache em disco de TJLP/SELIC. O nome nao esta na lista do
+    # daemon, entao a coleta forcada sempre roda localmente.
+    def _fetch_forced() -> object:
+        return fetch_fn(force_refresh=True)
+
+    return _fetch_forced
 
 
 def _select_fetches(
@@ -477,12 +574,13 @@ def _select_fetches(
 ) -> tuple[list[FetchSpec], dict[str, FetchOutcome]]:
     today = now.date()
     source_for_validation = reference_planilha_path or planilha_path
-    if source_for_validation.exists():
+    allow_morning_quotes = _hm(now) <= _MORNING_QUOTES_CUTOFF_HM
+    allow_ptax = _hm(now) >= _PTAX_AVAILABLE_FROM_HM
+    # Entre as janelas tudo e pulado por horario; nem abre a planilha.
+    if (allow_morning_quotes or allow_ptax) and source_for_validation.exists():
         filled = _read_filled_sources(source_for_validation, today)
     else:
         filled = _empty_filled_sources()
-    allow_morning_quotes = _hm(now) <= _MORNING_QUOTES_CUTOFF_HM
-    allow_ptax = _hm(now) >= _PTAX_AVAILABLE_FROM_HM
 
     all_specs = {
         "usd_brl": FetchSpec(
@@ -513,12 +611,12 @@ def _select_fetches(
         "tjlp": FetchSpec(
             key="tjlp",
             label=_SOURCE_LABELS["tjlp"],
-            fetch_fn=fetch_tjlp,
+            fetch_fn=_juros_fetch_fn(fetch_tjlp),
         ),
         "selic": FetchSpec(
             key="selic",
             label=_SOURCE_LABELS["selic"],
-            fetch_fn=fetch_selic,
+            fetch_fn=_juros_fetch_fn(fetch_selic),
         ),
     }
 
@@ -557,24 +655,16 @@ def _update_planilha(
     target_date: date,
     outcomes: dict[str, FetchOutcome],
     errors: list[str],
+    cdi_daily_percent: Decimal | None,
 ) -> dict[str, tuple[str, ...]]:
     _log(f"Atualizando planilha: {planilha_path} (gravacao unica)")
 
-    all_errors = list(errors)
     tjlp_quote = outcomes["tjlp"].value
     selic_quote = outcomes["selic"].value
     selic_percent = selic_quote.value if selic_quote else None
-    cdi_daily_percent = None
-    if selic_percent is not None:
-        try:
-            cdi_daily_percent = calculate_cdi_daily_percent(selic_percent)
-        except Exception as exc:
-            all_errors.append(_error_detail("CDI", exc))
-
-    errors[:] = all_errors
 
-    status = "ERRO" if all_errors else "OK"
-    detail = " | ".join(all_errors) if all_errors else None
+    status = "ERRO" if errors else "OK"
+    detail = " | ".join(errors) if errors else None
 
     written = update_xlsx_quotes_and_log(
         planilha_path,
@@ -641,7 +731,23 @@ def _update_planilha(
     return written
 
 
-def _log_quote_summary(outcomes: dict[str, FetchOutcome]) -> None:
+def _calculate_cdi(
+    outcomes: dict[str, FetchOutcome],
+) -> tuple[Decimal | None, str | None]:
+    selic = outcomes["selic"].value
+    if selic is None:
+        return None, None
+    try:
+        return calculate_cdi_daily_percent(selic.value), None
+    except Exception as exc:
+        return None, _error_detail("CDI", exc)
+
+
+def _log_quote_summary(
+    outcomes: dict[str, FetchOutcome],
+    cdi_daily_percent: Decimal | None,
+    cdi_error: str | None,
+) -> None:
     usd = outcomes["usd_brl"]
     quote = usd.value
     if quote:
@@ -727,11 +833,10 @@ def _log_quote_summary(outcomes: dict[str, FetchOutcome]) -> None:
             "SELIC: "
             f"{details} em {selic.collected_at.astimezone(_LOCAL_TZ)}"
         )
-        try:
-            cdi = calculate_cdi_daily_percent(selic.value)
-            _log(f"CDI (calculado): {cdi:.10f}")
-        except Exception as exc:
-            _log(f"CDI (calculado): erro ({exc.__class__.__name__}: {exc})")
+        if cdi_daily_percent is not None:
+            _log(f"CDI (calculado): {cdi_daily_percent:.10f}")
+        else:
+            _log(f"CDI (calculado): erro ({cdi_error})")
     elif selic_outcome.skipped:
         _log(f"SELIC: pulado ({selic_outcome.skip_reason})")
     else:
@@ -946,12 +1051,27 @@ def main() -> int:
             _log(f"Processo finalizado em {duration} (minutos:segundos).")
             return 0
 
+        if _env_flag("COTACOES_DAEMON"):
+            _log("Coleta via daemon local (fallback local se indisponivel).")
+            selected_specs = [
+                FetchSpec(
+                    key=spec.key,
+                    label=spec.label,
+                    fetch_fn=remote_fetch_fn(spec.fetch_fn),
+                )
+                for spec in selected_specs
+            ]
         outcomes.update(_run_fetches(selected_specs))
         errors = _collect_errors(outcomes)
         _log_fetch_summary(outcomes)
+        cdi_daily_percent, cdi_error = _calculate_cdi(outcomes)
+        if cdi_error:
+            errors.append(cdi_error)
 
         _log_stage(3, total_steps, "Atualizando planilha Excel.")
-        _update_planilha(planilha_path, now.date(), outcomes, errors)
+        _update_planilha(
+            planilha_path, now.date(), outcomes, errors, cdi_daily_percent
+        )
         local_validation_issues = _validate_planilha_row_consistency(
             planilha_path,
             target_date=now.date(),
@@ -969,7 +1089,7 @@ def main() -> int:
         update_csv_from_xlsx(planilha_path, csv_path)
 
         _log_stage(5, total_steps, "Resumo das cotacoes coletadas.")
-        _log_quote_summary(outcomes)
+        _log_quote_summary(outcomes, cdi_daily_percent, cdi_error)
         if errors:
             _log(f"Falhas na coleta: {len(errors)}. Consulte o log da planilha.")
         else:
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import threading
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import pytest
 
+from cotacoes_moedas import bcb_ptax
 from cotacoes_moedas.bcb_ptax import (
     PriceParseError,
+    PtaxQuote,
+    _extract_ptax_rows,
     _find_ptax_frame,
     _load_ptax_frame,
+    _load_ptax_rows,
+    fetch_all_ptax,
 )
 
 
@@ -26,6 +37,46 @@ class _FakeFrame:
         return _FakeLocator(self._selectors.get(selector, 0))
 
 
+class _FakeRowsLocator:
+    def __init__(self, rows: list[list[str]]) -> None:
+        self._rows = rows
+        self.calls = 0
+
+    def evaluate_all(self, _script: str) -> list[list[str]]:
+        self.calls += 1
+        return self._rows
+
+
+class _FakeDateCellLocator:
+    def __init__(self, appears: bool) -> None:
+        self._appears = appears
+        self.waits: list[tuple[str, int]] = []
+
+    def filter(self, **_kwargs) -> "_FakeDateCellLocator":
+        return self
+
+    @property
+    def first(self) -> "_FakeDateCellLocator":
+        return self
+
+    def wait_for(self, *, state: str, timeout: int) -> None:
+        self.waits.append((state, timeout))
+        if not self._appears:
+            raise PlaywrightTimeoutError("timeout")
+
+
+class _FakeRowsFrame:
+    def __init__(self, rows: list[list[str]], *, appears: bool = True) -> None:
+        self.rows_locator = _FakeRowsLocator(rows)
+        self.date_cell_locator = _FakeDateCellLocator(appears)
+
+    def locator(self, selector: str):
+        if selector == "tr td:first-child":
+            return self.date_cell_locator
+        assert selector == "tr"
+        return self.rows_locator
+
+
 class _FakePage:
     def __init__(self, frames: list[_FakeFrame], iframe_sources: list[str]) -> None:
         self.frames = frames
@@ -75,3 +126,337 @@ def test_load_ptax_frame_reports_iframe_sources_when_missing() -> None:
     message = str(exc_info.value)
     assert "iframe PTAX nao encontrado/carregado" in message
     assert "iframe-x" in message
+
+
+def test_fetch_all_ptax_runs_each_currency_in_its_own_thread(monkeypatch) -> None:
+    threads: dict[str, int] = {}
+
+    def fake_fetch_ptax(currency_label: str, symbol: str, **_kwargs) -> PtaxQuote:
+        threads[currency_label] = threading.get_ident()
+        return PtaxQuote(
+            symbol=symbol,
+            buy=Decimal("1.0000"),
+            sell=Decimal("1.1000"),
+            buy_raw="1,0000",
+            sell_raw="1,1000",
+            collected_at=datetime.now(timezone.utc),
+        )
+
+    monkeypatch.setattr(bcb_ptax, "_fetch_ptax", fake_fetch_ptax)
+
+    quotes = fetch_all_ptax()
+
+    assert set(quotes) == {"ptax_usd", "ptax_eur", "ptax_chf"}
+    assert quotes["ptax_eur"].symbol == "EUR/BRL PTAX"
+    assert threading.get_ident() not in threads.values()
+
+
+def test_fetch_all_ptax_reports_failed_currencies(monkeypatch) -> None:
+    def fake_fetch_ptax(currency_label: str, symbol: str, **_kwargs) -> PtaxQuote:
+        if currency_label == bcb_ptax.PTAX_CHF_LABEL:
+            raise PriceParseError("timeout ao buscar PTAX")
+        return PtaxQuote(
+            symbol=symbol,
+            buy=Decimal("1.0000"),
+            sell=Decimal("1.1000"),
+            buy_raw="1,0000",
+            sell_raw="1,1000",
+            collected_at=datetime.now(timezone.utc),
+        )
+
+    monkeypatch.setattr(bcb_ptax, "_fetch_ptax", fake_fetch_ptax)
+
+    with pytest.raises(PriceParseError) as exc_info:
+        fetch_all_ptax()
+
+    assert "ptax_chf" in str(exc_info.value)
+    assert "ptax_usd" not in str(exc_info.value)
+
+
+def test_extract_ptax_rows_uses_single_evaluate_call() -> None:
+    frame = _FakeRowsFrame(
+        [
+            [],
+            ["Data", "Tipo", "Compra", "Venda"],
+            ["22/01/2026", "A", "5,3000", "5,3006"],
+            ["23/01/2026", "A", "5,2849", "5,2855"],
+            ["23/01/2026", "A"],
+        ]
+    )
+
+    rows = _extract_ptax_rows(frame)
+
+    assert frame.rows_locator.calls == 1
+    assert rows == [
+        (date(2026, 1, 22), "22/01/2026", "5,3000", "5,3006"),
+        (date(2026, 1, 23), "23/01/2026", "5,2849", "5,2855"),
+    ]
+
+
+def test_load_ptax_rows_waits_for_date_cell_then_reads_once() -> None:
+    frame = _FakeRowsFrame([["23/01/2026", "A", "5,2849", "5,2855"]])
+
+    rows = _load_ptax_rows(frame, timeout_ms=1500)
+
+    assert frame.date_cell_locator.waits == [("visible", 1500)]
+    assert frame.rows_locator.calls == 1
+    assert rows == [(date(2026, 1, 23), "23/01/2026", "5,2849", "5,2855")]
+
+
+def test_load_ptax_rows_reports_timeout() -> None:
+    frame = _FakeRowsFrame([], appears=False)
+
+    with pytest.raises(PriceParseError, match="timeout ao carregar tabela PTAX"):
+        _load_ptax_rows(frame, timeout_ms=10)
+
+    assert frame.rows_locator.calls == 0
+
+
+def test_fetch_ptax_multi_reuses_page_and_resubmits_form(monkeypatch) -> None:
+    opened_pages: list[object] = []
+    submitted: list[str] = []
+
+    class _FakeFormFrame:
+        url = "https://ptax.bcb.gov.br/ptax_internet/consultaBoletim.do"
+
+        def __init__(self) -> None:
+            self.gotos: list[str] = []
+
+        def goto(self, url: str, **_kwargs) -> None:
+            self.gotos.append(url)
+
+    frame = _FakeFormFrame()
+
+    @contextmanager
+    def fake_chromium_page(**_kwargs):
+        page = object()
+        opened_pages.append(page)
+        yield page
+
+    prices = {
+        bcb_ptax.PTAX_USD_LABEL: ("5,2849", "5,2855"),
+        bcb_ptax.PTAX_EUR_LABEL: ("6,1000", "6,1010"),
+    }
+    def offline_boletim(*_args, **_kwargs) -> str:
+        raise OSError("sem rede")
+
+    monkeypatch.setattr(bcb_ptax, "fetch_ptax_boletim_html", offline_boletim)
+    monkeypatch.setattr(bcb_ptax, "chromium_page", fake_chromium_page)
+    monkeypatch.setattr(bcb_ptax, "_open_ptax_frame", lambda *_a, **_k: frame)
+    monkeypatch.setattr(bcb_ptax, "_ensure_ptax_form", lambda *_a: None)
+    monkeypatch.setattr(
+        bcb_ptax,
+        "_submit_ptax",
+        lambda _frame, label, **_kwargs: submitted.append(label),
+    )
+    monkeypatch.setattr(
+        bcb_ptax,
+        "_scrape_current_rows",
+        lambda *_args: prices[submitted[-1]],
+    )
+
+    quotes = bcb_ptax.fetch_ptax_multi(
+        [bcb_ptax.PTAX_USD_LABEL, bcb_ptax.PTAX_EUR_LABEL]
+    )
+
+    assert len(opened_pages) == 1
+    assert submitted == [bcb_ptax.PTAX_USD_LABEL, bcb_ptax.PTAX_EUR_LABEL]
+    assert frame.gotos == [frame.url]
+    assert quotes[bcb_ptax.PTAX_USD_LABEL].symbol == "USD/BRL PTAX"
+    assert quotes[bcb_ptax.PTAX_EUR_LABEL].sell == Decimal("6.1010")
+
+
+def test_fetch_ptax_multi_rejects_unknown_label() -> None:
+    with pytest.raises(ValueError, match="moeda PTAX desconhecida"):
+        bcb_ptax.fetch_ptax_multi(["IENE"])
+
+
+class _FakeSubmitLocator:
+    def __init__(self, frame: "_FakeSubmitFrame", selector: str) -> None:
+        self._frame = frame
+        self._selector = selector
+
+    def check(self) -> None:
+        self._frame.actions.append(("check", self._selector))
+
+    def fill(self, value: str) -> None:
+        self._frame.actions.append(("fill", value))
+
+    def select_option(self, *, label: str) -> None:
+        self._frame.actions.append(("select", label))
+
+    def click(self) -> None:
+        self._frame.actions.append(("click", self._selector))
+
+
+class _FakeResponseInfo:
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+
+class _FakeSubmitPage:
+    def __init__(self, frame: "_FakeSubmitFrame", status: int) -> None:
+        self._frame = frame
+        self._status = status
+        self.expect_timeouts: list[int] = []
+
+    @contextmanager
+    def expect_response(self, predicate, *, timeout: int):
+        self.expect_timeouts.append(timeout)
+        request = type(
+            "Request",
+            (),
+            {"frame": self._frame, "is_navigation_request": lambda _self: True},
+        )()
+        response = type(
+            "Response",
+            (),
+            {"request": request, "status": self._status, "ok": self._status < 400},
+        )()
+        yield _FakeResponseInfo(response)
+        assert self._frame.actions[-1][0] == "click"
+        assert predicate(response)
+
+
+class _FakeSubmitFrame:
+    def __init__(self, status: int = 200) -> None:
+        self.actions: list[tuple[str, str]] = []
+        self.page = _FakeSubmitPage(self, status)
+
+    def locator(self, selector: str) -> _FakeSubmitLocator:
+        return _FakeSubmitLocator(self, selector)
+
+
+def test_submit_ptax_waits_for_frame_navigation_response() -> None:
+    frame = _FakeSubmitFrame()
+
+    response = bcb_ptax._submit_ptax(
+        frame,
+        bcb_ptax.PTAX_USD_LABEL,
+        start=date(2026, 1, 16),
+        end=date(2026, 1, 23),
+        timeout_ms=4000,
+    )
+
+    assert response.status == 200
+    assert frame.page.expect_timeouts == [4000]
+    assert ("select", bcb_ptax.PTAX_USD_LABEL) in frame.actions
+    assert ("fill", "23/01/2026") in frame.actions
+
+
+def test_submit_ptax_reports_http_error() -> None:
+    frame = _FakeSubmitFrame(status=503)
+
+    with pytest.raises(PriceParseError, match="HTTP 503"):
+        bcb_ptax._submit_ptax(
+            frame,
+            bcb_ptax.PTAX_EUR_LABEL,
+            start=date(2026, 1, 16),
+            end=date(2026, 1, 23),
+            timeout_ms=4000,
+        )
+
+
+def test_extract_ptax_rows_html_reads_response_table() -> None:
+    html = """
+    <table>
+      <tr><th>Data</th><th>Tipo</th><th>Compra</th><th>Venda</th></tr>
+      <tr><td>22/01/2026</td><td>A</td><td>5,3000</td><td>5,3006</td></tr>
+      <tr class="par"><td> 23/01/2026 </td><td>A</td><td>5,2849</td><td>5,2855
+      <tr><td colspan="4">Nenhum dado&nbsp;adicional</td></tr>
+    </table>
+    """
+
+    rows = bcb_ptax._extract_ptax_rows_html(html)
+
+    assert rows == [
+        (date(2026, 1, 22), "22/01/2026", "5,3000", "5,3006"),
+        (date(2026, 1, 23), "23/01/2026", "5,2849", "5,2855"),
+    ]
+
+
+def test_scrape_current_rows_prefers_response_html() -> None:
+    frame = _FakeRowsFrame([], appears=False)
+    html = "<table><tr><td>23/01/2026</td><td>A</td><td>5,28</td><td>5,29</td></tr></table>"
+
+    buy_raw, sell_raw = bcb_ptax._scrape_current_rows(
+        frame, date(2026, 1, 23), 1000, html
+    )
+
+    assert (buy_raw, sell_raw) == ("5,28", "5,29")
+    assert frame.date_cell_locator.waits == []
+
+
+def test_fetch_ptax_uses_http_boletim_without_browser(monkeypatch) -> None:
+    today = date.today().strftime("%d/%m/%Y")
+    requested: list[int] = []
+
+    def fake_boletim(currency_code: int, _start, _end, **_kwargs) -> str:
+        requested.append(currency_code)
+        return (
+            f"<table><tr><td>{today}</td><td>A</td>"
+            "<td>5,2849</td><td>5,2855</td></tr></table>"
+        )
+
+    def no_browser(**_kwargs):
+        raise AssertionError("nao deveria abrir o navegador")
+
+    monkeypatch.setattr(bcb_ptax, "fetch_ptax_boletim_html", fake_boletim)
+    monkeypatch.setattr(bcb_ptax, "chromium_page", no_browser)
+
+    quote = bcb_ptax.fetch_dolar_ptax()
+
+    assert requested == [61]
+    assert quote.buy == Decimal("5.2849")
+    assert quote.symbol == "USD/BRL PTAX"
+
+
+def test_fetch_ptax_keeps_baseline_positional_signature(monkeypatch) -> None:
+    captured: dict[str, object] = {}
+
+    def fake_fetch_ptax(**kwargs):
+        captured.update(kwargs)
+        return "quote"
+
+    monkeypatch.setattr(bcb_ptax, "_fetch_ptax", fake_fetch_ptax)
+
+    with pytest.deprecated_call():
+        assert bcb_ptax.fetch_dolar_ptax(True, 30000) == "quote"
+
+    assert captured["overall_timeout_ms"] == 30000
+    assert captured["lookback_days"] == 7
+
+    with pytest.deprecated_call():
+        bcb_ptax.fetch_dolar_ptax(True, 45000, 3)
+    assert captured["lookback_days"] == 3
+    with pytest.raises(TypeError):
+        bcb_ptax.fetch_dolar_ptax(True, 45000, 3, 2)
+
+
+def test_read_ptax_quote_http_signals_fallback_on_failure(monkeypatch) -> None:
+    def broken_boletim(*_args, **_kwargs) -> str:
+        raise OSError("conexao recusada")
+
+    monkeypatch.setattr(bcb_ptax, "fetch_ptax_boletim_html", broken_boletim)
+    assert (
+        bcb_ptax._read_ptax_quote_http(
+            bcb_ptax.PTAX_EUR_LABEL,
+            today=date(2026, 1, 23),
+            start=date(2026, 1, 16),
+            timeout_ms=1000,
+        )
+        is None
+    )
+
+    monkeypatch.setattr(
+        bcb_ptax, "fetch_ptax_boletim_html", lambda *_a, **_k: "<p>sem tabela</p>"
+    )
+    assert (
+        bcb_ptax._read_ptax_quote_http(
+            bcb_ptax.PTAX_EUR_LABEL,
+            today=date(2026, 1, 23),
+            start=date(2026, 1, 16),
+            timeout_ms=1000,
+        )
+        is None
+    )
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+import socket
+import threading
+import time
+
+import pytest
+
+from cotacoes_moedas import daemon
+
+
+def _free_address() -> tuple[str, int]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()
+
+
+def _wait_call(address: tuple[str, int], fn_name: str, authkey: bytes) -> object:
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            return daemon.call(fn_name, address=address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def test_daemon_serves_whitelisted_fetchers_until_shutdown(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fetch_usd_brl() -> str:
+        calls.append(threading.current_thread().name)
+        return "5,2849"
+
+    def fetch_selic() -> str:
+        raise RuntimeError("pagina fora do ar")
+
+    monkeypatch.setitem(daemon.FETCHERS, "fetch_usd_brl", fetch_usd_brl)
+    monkeypatch.setitem(daemon.FETCHERS, "fetch_selic", fetch_selic)
+    warmed: list[str] = []
+    monkeypatch.setattr(
+        daemon,
+        "warm_up_browser",
+        lambda: warmed.append(threading.current_thread().name),
+    )
+    address = _free_address()
+    authkey = b"chave-teste"
+    server = threading.Thread(
+        target=daemon.serve,
+        args=(address,),
+        kwargs={"authkey": authkey, "workers": 1},
+    )
+    server.start()
+    try:
+        assert _wait_call(address, "fetch_usd_brl", authkey) == "5,2849"
+        assert daemon.call("fetch_usd_brl", address=address, authkey=authkey) == "5,2849"
+        with pytest.raises(daemon.DaemonError, match="pagina fora do ar"):
+            daemon.call("fetch_selic", address=address, authkey=authkey)
+        with pytest.raises(daemon.DaemonError, match="funcao desconhecida"):
+            daemon.call("os_system", address=address, authkey=authkey)
+    finally:
+        daemon.call(daemon._SHUTDOWN, address=address, authkey=authkey)
+        server.join(timeout=5)
+
+    assert not server.is_alive()
+    assert len(set(calls)) == 1
+    assert warmed == calls[:1]
+
+
+def test_daemon_survives_dropped_silent_and_unauthorized_clients(monkeypatch) -> None:
+    monkeypatch.setitem(daemon.FETCHERS, "fetch_usd_brl", lambda: "5,2849")
+    monkeypatch.setattr(daemon, "warm_up_browser", lambda: None)
+    address = _free_address()
+    authkey = b"chave-teste"
+    server = threading.Thread(
+        target=daemon.serve,
+        args=(address,),
+        kwargs={"authkey": authkey, "workers": 1},
+    )
+    server.start()
+    silent = None
+    try:
+        assert _wait_call(address, "fetch_usd_brl", authkey) == "5,2849"
+
+        socket.create_connection(address).close()
+        with pytest.raises(AuthenticationError):
+            daemon.call("fetch_usd_brl", address=address, authkey=b"errada")
+        # Cliente que conecta e fica calado nao segura os demais.
+        silent = socket.create_connection(address)
+
+        assert daemon.call("fetch_usd_brl", address=address, authkey=authkey) == "5,2849"
+        assert server.is_alive()
+    finally:
+        if silent is not None:
+            silent.close()
+        daemon.call(daemon._SHUTDOWN, address=address, authkey=authkey)
+        server.join(timeout=5)
+
+    assert not server.is_alive()
+
+
+def test_call_times_out_when_daemon_does_not_answer(monkeypatch) -> None:
+    address = _free_address()
+    authkey = b"chave-teste"
+    listener = Listener(address, authkey=authkey)
+    accepted: list[object] = []
+    accepter = threading.Thread(
+        target=lambda: accepted.append(listener.accept()), daemon=True
+    )
+    accepter.start()
+    try:
+        with pytest.raises(TimeoutError):
+            daemon.call("fetch_usd_brl", address=address, authkey=authkey, timeout_s=0.1)
+    finally:
+        accepter.join(timeout=5)
+        for conn in accepted:
+            conn.close()
+        listener.close()
+
+
+def test_remote_fetch_fn_falls_back_to_local_without_daemon(monkeypatch) -> None:
+    def fetch_tjlp() -> str:
+        return "local"
+
+    def refuse(*_args, **_kwargs) -> object:
+        raise ConnectionRefusedError("sem daemon")
+
+    monkeypatch.setattr(daemon, "call", refuse)
+
+    assert daemon.remote_fetch_fn(fetch_tjlp)() == "local"
+
+
+@pytest.mark.parametrize(
+    "error",
+    [AuthenticationError("digest recebido errado"), EOFError()],
+)
+def test_remote_fetch_fn_falls_back_on_auth_or_dropped_connection(
+    monkeypatch,
+    error: Exception,
+) -> None:
+    def fetch_tjlp() -> str:
+        return "local"
+
+    def broken(*_args, **_kwargs) -> object:
+        raise error
+
+    monkeypatch.setattr(daemon, "call", broken)
+
+    assert daemon.remote_fetch_fn(fetch_tjlp)() == "local"
+
+
+def test_load_authkey_only_creates_key_for_server(monkeypatch, tmp_path) -> None:
+    key_path = tmp_path / "daemon.key"
+    monkeypatch.delenv("COTACOES_DAEMON_AUTHKEY", raising=False)
+    monkeypatch.setattr(daemon, "DAEMON_KEY_PATH", str(key_path))
+
+    with pytest.raises(FileNotFoundError):
+        daemon._load_authkey()
+    assert not key_path.exists()
+
+    key = daemon._load_authkey(create=True)
+    assert key_path.read_bytes() == key
+    assert daemon._load_authkey() == key
@@ -1,8 +1,159 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
 from decimal import Decimal
 
-from cotacoes_moedas.juros import calculate_cdi_daily_percent
+from cotacoes_moedas import juros
+from cotacoes_moedas.juros import (
+    InterestRateQuote,
+    _extract_latest_selic_row,
+    _parse_percent_value,
+    calculate_cdi_daily_percent,
+    calculate_cdi_daily_percent_fast,
+    ttl_cache,
+)
+
+
+class _FakePage:
+    def __init__(self, latest: list[str] | None) -> None:
+        self._latest = latest
+        self.evaluate_calls = 0
+
+    def evaluate(self, _script: str) -> list[str] | None:
+        self.evaluate_calls += 1
+        return self._latest
+
+
+class _FakeValueLocator:
+    def __init__(self, calls: list[tuple[str, int]]) -> None:
+        self._calls = calls
+
+    @property
+    def first(self) -> "_FakeValueLocator":
+        return self
+
+    def wait_for(self, *, state: str, timeout: int) -> None:
+        self._calls.append(("wait_for", timeout))
+
+    def inner_text(self, *, timeout: int) -> str:
+        self._calls.append(("inner_text", timeout))
+        return " 7,93% "
+
+
+class _FakeTjlpPage:
+    url = "https://www.bndes.gov.br/tjlp"
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int]] = []
+
+    def goto(self, _url: str, *, wait_until: str, timeout: int) -> None:
+        self.calls.append(("goto", timeout))
+
+    def locator(self, *_args, **_kwargs) -> _FakeValueLocator:
+        return _FakeValueLocator(self.calls)
 
 
 def test_calculate_cdi_daily_percent_matches_hp12c_example() -> None:
     cdi = calculate_cdi_daily_percent(Decimal("15.00"))
     assert cdi == Decimal("0.0551310642")
+
+
+def test_extract_latest_selic_row_uses_single_evaluate() -> None:
+    page = _FakePage(["28/01/2026", "15,00"])
+
+    latest = _extract_latest_selic_row(page)
+
+    assert page.evaluate_calls == 1
+    assert latest == (date(2026, 1, 28), "28/01/2026", "15,00")
+
+
+def test_extract_latest_selic_row_handles_missing_or_invalid_row() -> None:
+    assert _extract_latest_selic_row(_FakePage(None)) is None
+    assert _extract_latest_selic_row(_FakePage(["31/02/2026", "15,00"])) is None
+
+
+def test_ttl_cache_reuses_quote_until_forced(tmp_path) -> None:
+    calls: list[int] = []
+
+    @ttl_cache(tmp_path / "juros.json", ttl_seconds=3600)
+    def fetch_fake() -> InterestRateQuote:
+        calls.append(1)
+        return InterestRateQuote(
+            name="SELIC",
+            value=Decimal("15.00"),
+            value_raw="15,00",
+            reference_date=date(2026, 1, 28),
+            collected_at=datetime.now(timezone.utc),
+        )
+
+    first = fetch_fake()
+    second = fetch_fake()
+    third = fetch_fake(force_refresh=True)
+
+    assert len(calls) == 2
+    assert second == first
+    assert third.value == Decimal("15.00")
+
+
+def test_ttl_cache_ignores_expired_entries(tmp_path) -> None:
+    calls: list[int] = []
+
+    @ttl_cache(tmp_path / "juros.json", ttl_seconds=0)
+    def fetch_fake() -> InterestRateQuote:
+        calls.append(1)
+        return InterestRateQuote(
+            name="TJLP",
+            value=Decimal("9.19"),
+            value_raw="9,19%",
+            reference_date=None,
+            collected_at=datetime.now(timezone.utc),
+        )
+
+    fetch_fake()
+    fetch_fake()
+
+    assert len(calls) == 2
+
+
+def test_parse_percent_value_handles_whitespace_and_suffixes() -> None:
+    assert _parse_percent_value("  7,93\n%  a.a.") == Decimal("7.93")
+    assert _parse_percent_value("15,00") == Decimal("15.00")
+
+
+def test_calculate_cdi_daily_percent_fast_matches_decimal_version() -> None:
+    for selic in ("15.00", "10.50", "2.00"):
+        exact = calculate_cdi_daily_percent(Decimal(selic))
+        fast = calculate_cdi_daily_percent_fast(float(selic))
+        assert abs(Decimal(str(fast)) - exact) < Decimal("0.0000000001")
+
+
+def test_fetch_tjlp_uses_selector_timeout_for_value_read(monkeypatch) -> None:
+    page = _FakeTjlpPage()
+
+    @contextmanager
+    def fake_chromium_page(**_kwargs):
+        yield page
+
+    consistency: dict[str, object] = {}
+    monkeypatch.setattr(juros, "chromium_page", fake_chromium_page)
+    monkeypatch.setattr(
+        juros,
+        "ensure_page_consistency",
+        lambda _page, **kwargs: consistency.update(kwargs),
+    )
+
+    # `__wrapped__` pula o cache em disco do `ttl_cache`.
+    quote = juros.fetch_tjlp.__wrapped__(
+        navigation_timeout_ms=9000,
+        selector_timeout_ms=1234,
+    )
+
+    assert quote.value == Decimal("7.93")
+    assert page.calls == [
+        ("goto", 9000),
+        ("wait_for", 9000),
+        ("inner_text", 1234),
+    ]
+    # O bloco de valor e contado no mesmo evaluate das demais contagens.
+    assert consistency["bulk_selectors"] == {"valor": ("div.valor", "%")}
+    checks = {check.name: check for check in consistency["checks"]}
+    assert checks["seletor de valor"].uses_counts
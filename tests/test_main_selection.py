@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 import os
 from pathlib import Path
+import threading
 
 from openpyxl import Workbook
 
@@ -80,7 +81,10 @@ def test_select_fetches_between_windows_runs_nothing(
     now = datetime(2026, 2, 4, 9, 0, 0, tzinfo=main._LOCAL_TZ)
     planilha_path = _make_planilha_path(tmp_path)
 
-    monkeypatch.setattr(main, "_read_filled_sources", lambda *_: _all_unfilled())
+    def fail_read_filled_sources(*_):
+        raise AssertionError("planilha nao deveria ser lida fora das janelas")
+
+    monkeypatch.setattr(main, "_read_filled_sources", fail_read_filled_sources)
 
     selected_specs, outcomes = main._select_fetches(now, planilha_path)
 
@@ -117,6 +121,30 @@ def test_select_fetches_skips_filled_fields(
     assert outcomes["selic"].skip_reason == "fora do horario (apos 08:30)"
 
 
+def test_select_fetches_forces_juros_refresh_from_env(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    now = datetime(2026, 2, 4, 7, 0, 0, tzinfo=main._LOCAL_TZ)
+    planilha_path = _make_planilha_path(tmp_path)
+    calls: list[dict[str, object]] = []
+
+    def fake_fetch_tjlp(**kwargs) -> str:
+        calls.append(kwargs)
+        return "tjlp"
+
+    monkeypatch.setattr(main, "_read_filled_sources", lambda *_: _all_unfilled())
+    monkeypatch.setattr(main, "fetch_tjlp", fake_fetch_tjlp)
+    monkeypatch.setenv("COTACOES_JUROS_REFRESH", "1")
+
+    selected_specs, _ = main._select_fetches(now, planilha_path)
+    tjlp_spec = next(spec for spec in selected_specs if spec.key == "tjlp")
+
+    assert tjlp_spec.fetch_fn() == "tjlp"
+    assert calls == [{"force_refresh": True}]
+    assert main.remote_fetch_fn(tjlp_spec.fetch_fn) is tjlp_spec.fetch_fn
+
+
 def test_select_reference_planilha_path_prefers_network_when_exists(
     tmp_path: Path,
 ) -> None:
@@ -152,6 +180,50 @@ def test_select_reference_planilha_path_returns_network_candidate_when_missing(
     assert not selected.exists()
 
 
+def test_select_reference_planilha_path_skips_unresponsive_candidate(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    local_planilha_path = _make_planilha_path(tmp_path, "local.xlsx")
+    offline_base = tmp_path / "offline"
+    online_base = tmp_path / "online"
+    online_xlsx = online_base / "cotacoes" / "planilhas" / "cotacoes.xlsx"
+    online_xlsx.parent.mkdir(parents=True, exist_ok=True)
+    online_xlsx.write_text("", encoding="utf-8")
+
+    release = threading.Event()
+    original_exists = Path.exists
+
+    def fake_exists(self: Path, *args, **kwargs) -> bool:
+        if offline_base in self.parents:
+            release.wait(5)
+            return True
+        return original_exists(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "exists", fake_exists)
+    monkeypatch.setattr(main, "_PATH_PROBE_TIMEOUT_S", 0.1)
+
+    try:
+        selected = main._select_reference_planilha_path(
+            local_planilha_path,
+            network_dirs=[str(offline_base), str(online_base)],
+            network_dest_folder="cotacoes",
+        )
+    finally:
+        release.set()
+
+    assert selected == online_xlsx
+
+
+def test_same_path_matches_equivalent_paths(tmp_path: Path) -> None:
+    planilha_path = _make_planilha_path(tmp_path)
+    missing_path = tmp_path / "faltando.xlsx"
+
+    assert main._same_path(planilha_path, tmp_path / "." / planilha_path.name)
+    assert main._same_path(missing_path, tmp_path / "sub" / ".." / missing_path.name)
+    assert not main._same_path(planilha_path, missing_path)
+
+
 def test_select_reference_planilha_path_uses_local_when_no_network_dir(
     tmp_path: Path,
 ) -> None:
@@ -256,6 +328,29 @@ def test_main_aborts_when_network_reference_planilha_missing_and_bootstrap_fails
     assert exit_code == 1
 
 
+def test_read_filled_sources_reads_target_row_values(tmp_path: Path) -> None:
+    planilha_path = tmp_path / "cotacoes.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["A3"] = datetime(2026, 2, 11)
+    sheet["D3"] = 5.1
+    sheet["E3"] = 5.2
+    sheet["A4"] = "12/02/2026"
+    sheet["B4"] = 5.2849
+    sheet["C4"] = 5.2869
+    sheet["F4"] = "  "
+    sheet["G4"] = 5.5
+    workbook.save(planilha_path)
+    workbook.close()
+
+    filled = main._read_filled_sources(planilha_path, datetime(2026, 2, 12).date())
+
+    assert filled["usd_brl"] is True
+    assert filled["ptax_usd"] is False
+    assert filled["turismo"] is False
+    assert not any(filled[key] for key in ("ptax_eur", "ptax_chf", "tjlp", "selic"))
+
+
 def test_validate_planilha_row_consistency_detects_missing_expected_fields(
     tmp_path: Path,
 ) -> None:
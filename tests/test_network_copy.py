@@ -1,7 +1,7 @@
 from pathlib import Path
 
 import main
-from cotacoes_moedas import network_sync
+from cotacoes_moedas import network_copy, network_sync
 
 
 def test_copy_planilhas_to_network(monkeypatch) -> None:
@@ -41,3 +41,33 @@ def test_copy_planilhas_to_network(monkeypatch) -> None:
     assert copied == [
         (planilhas_dir, target_dir / planilhas_dir.name, True),
     ]
+
+
+def test_to_unc_resolves_drive_root_once(monkeypatch) -> None:
+    resolved: list[str] = []
+
+    def fake_drive_to_unc(drive: str) -> str:
+        resolved.append(drive)
+        return "\\\\servidor\\share\\"
+
+    monkeypatch.setattr(network_copy.os, "name", "nt")
+    monkeypatch.setattr(network_copy, "_drive_to_unc", fake_drive_to_unc)
+
+    assert network_copy.to_unc("z:\\Cotacoes\\2026") == "\\\\servidor\\share\\Cotacoes\\2026"
+    assert network_copy.to_unc("Z:") == "\\\\servidor\\share\\"
+    assert resolved == ["Z:", "Z:"]
+
+
+def test_copy_tree_parallel_copies_nested_files(tmp_path) -> None:
+    source = tmp_path / "planilhas"
+    (source / "2026").mkdir(parents=True)
+    (source / "cotacoes.xlsx").write_bytes(b"xlsx")
+    (source / "2026" / "cotacoes.csv").write_text("data;valor\n", encoding="utf-8")
+    destino = tmp_path / "rede" / "planilhas"
+
+    network_sync._copy_tree_parallel(source, destino)
+
+    assert (destino / "cotacoes.xlsx").read_bytes() == b"xlsx"
+    assert (destino / "2026" / "cotacoes.csv").read_text(encoding="utf-8") == (
+        "data;valor\n"
+    )
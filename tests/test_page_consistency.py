@@ -46,3 +46,43 @@ def test_ensure_page_consistency_reports_failures() -> None:
     assert "falhou seletor" in message
     assert "check-2" in message
     assert "url='https://example.com/test'" in message
+
+
+class _FakeCountingPage(_FakePage):
+    def __init__(self, counts: dict[str, int]) -> None:
+        super().__init__("https://example.com", "Example")
+        self._counts = counts
+        self.evaluate_calls = 0
+
+    def evaluate(self, _script: str, selectors: dict[str, str]) -> dict[str, int]:
+        self.evaluate_calls += 1
+        return {key: self._counts.get(selector, 0) for key, selector in selectors.items()}
+
+
+def test_ensure_page_consistency_reads_bulk_selectors_once() -> None:
+    page = _FakeCountingPage({"table tr": 3, "#preco": 0})
+
+    with pytest.raises(PageConsistencyError) as exc_info:
+        ensure_page_consistency(
+            page,
+            source="fonte-y",
+            checks=[
+                PageCheck("url", lambda _: (True, "")),
+                PageCheck(
+                    "linhas",
+                    lambda _p, counts: (counts["linhas"] > 1, "poucas linhas"),
+                    uses_counts=True,
+                ),
+                PageCheck(
+                    "preco",
+                    lambda _p, counts: (counts["preco"] > 0, "sem preco"),
+                    uses_counts=True,
+                ),
+            ],
+            bulk_selectors={"linhas": "table tr", "preco": "#preco"},
+        )
+
+    assert page.evaluate_calls == 1
+    message = str(exc_info.value)
+    assert "sem preco" in message
+    assert "poucas linhas" not in message
@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+import pytest
+
+from cotacoes_moedas.parsing import ParseDecimalError, is_br_date, parse_pt_br_decimal
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("5,2849", Decimal("5.2849")),
+        ("5.284,90", Decimal("5284.90")),
+        ("R$ 5,2849", Decimal("5.2849")),
+        ("R$ 5,2849", Decimal("5.2849")),
+        ("15,00 %", Decimal("15.00")),
+        ("-0,50", Decimal("-0.50")),
+        ("5.2849", Decimal("5.2849")),
+        ("USD 5,2849", Decimal("5.2849")),
+    ],
+)
+def test_parse_pt_br_decimal_accepts_common_formats(text: str, expected: Decimal) -> None:
+    assert parse_pt_br_decimal(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "-", "abc", None])
+def test_parse_pt_br_decimal_rejects_invalid_values(text) -> None:
+    with pytest.raises(ParseDecimalError):
+        parse_pt_br_decimal(text)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("23/01/2026", True),
+        ("3/01/2026", False),
+        ("23-01-2026", False),
+        ("23/01/2026 ", False),
+        ("Data", False),
+        ("２3/01/2026", False),
+    ],
+)
+def test_is_br_date(text: str, expected: bool) -> None:
+    assert is_br_date(text) is expected
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import threading
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import pytest
+
+from cotacoes_moedas import playwright_utils
+
+
+class _FakeCdpSession:
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, dict[str, object] | None]] = []
+
+    def send(self, method: str, params: dict[str, object] | None = None) -> None:
+        self.sent.append((method, params))
+
+
+class _FakePage:
+    def __init__(self, context: "_FakeContext") -> None:
+        self.context = context
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self, options: dict[str, object]) -> None:
+        self.options = options
+        self.pages: list[_FakePage] = []
+        self.cdp_sessions: list[_FakeCdpSession] = []
+        self.closed = False
+
+    def new_page(self) -> _FakePage:
+        page = _FakePage(self)
+        self.pages.append(page)
+        return page
+
+    def new_cdp_session(self, _page: _FakePage) -> _FakeCdpSession:
+        session = _FakeCdpSession()
+        self.cdp_sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self, args: list[str]) -> None:
+        self.args = args
+        self.contexts: list[_FakeContext] = []
+        self.closed = False
+
+    def is_connected(self) -> bool:
+        return not self.closed
+
+    def new_context(self, **options) -> _FakeContext:
+        context = _FakeContext(options)
+        self.contexts.append(context)
+        return context
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _FakeChromium:
+    def __init__(self) -> None:
+        self.launched: list[_FakeBrowser] = []
+        self.persistent: list[tuple[str, _FakeContext]] = []
+        self.connected: list[tuple[str, _FakeBrowser]] = []
+
+    def launch(self, *, headless: bool, args: list[str]) -> _FakeBrowser:
+        browser = _FakeBrowser(args)
+        self.launched.append(browser)
+        return browser
+
+    def connect_over_cdp(self, endpoint_url: str) -> _FakeBrowser:
+        browser = _FakeBrowser([])
+        self.connected.append((endpoint_url, browser))
+        return browser
+
+    def launch_persistent_context(self, user_data_dir: str, **options) -> _FakeContext:
+        context = _FakeContext(options)
+        self.persistent.append((user_data_dir, context))
+        return context
+
+
+class _FakePlaywright:
+    def __init__(self) -> None:
+        self.chromium = _FakeChromium()
+        self.stopped = False
+
+    def stop(self) -> None:
+        self.stopped = True
+
+
+class _FakeManager:
+    def __init__(self) -> None:
+        self.started: list[_FakePlaywright] = []
+
+    def __call__(self) -> "_FakeManager":
+        return self
+
+    def start(self) -> _FakePlaywright:
+        playwright = _FakePlaywright()
+        self.started.append(playwright)
+        return playwright
+
+
+def test_chromium_page_reuses_browser_and_closes_context(monkeypatch) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    playwright_utils.close_shared_browser()
+
+    proxy = {"server": "http://proxy:8080"}
+    try:
+        with playwright_utils.chromium_page(proxy=proxy, use_persistent=False) as page:
+            assert isinstance(page, _FakePage)
+        with playwright_utils.chromium_page(proxy=proxy, use_persistent=False):
+            pass
+
+        assert len(manager.started) == 1
+        launched = manager.started[0].chromium.launched
+        assert len(launched) == 1
+        assert len(launched[0].contexts) == 2
+        assert all(context.closed for context in launched[0].contexts)
+        assert launched[0].contexts[0].options["proxy"] == proxy
+    finally:
+        playwright_utils.close_shared_browser()
+
+    assert manager.started[0].stopped
+    assert manager.started[0].chromium.launched[0].closed
+
+
+def test_shared_browser_is_per_thread_and_per_launch_args(monkeypatch) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    playwright_utils.close_shared_browser()
+
+    try:
+        default_browser = playwright_utils.get_shared_browser()
+        sandbox_browser = playwright_utils.get_shared_browser(
+            launch_args=["--no-sandbox"]
+        )
+        assert default_browser is not sandbox_browser
+        assert "--no-sandbox" in sandbox_browser.args
+        assert playwright_utils.get_shared_browser() is default_browser
+
+        other: list[object] = []
+
+        def _worker() -> None:
+            other.append(playwright_utils.get_shared_browser())
+            playwright_utils.close_shared_browser()
+
+        thread = threading.Thread(target=_worker)
+        thread.start()
+        thread.join()
+
+        assert other[0] is not default_browser
+        assert len(manager.started) == 2
+    finally:
+        playwright_utils.close_shared_browser()
+
+
+def test_exit_hook_closes_own_browser_and_flags_unclosed_workers(
+    monkeypatch,
+    tmp_path,
+    capsys,
+) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    monkeypatch.setattr(playwright_utils, "_open_states", {})
+    monkeypatch.setattr(playwright_utils, "CHROMIUM_PROFILE_ROOT", str(tmp_path))
+    playwright_utils.close_shared_browser()
+
+    def _well_behaved() -> None:
+        playwright_utils.get_shared_browser()
+        playwright_utils.close_shared_browser()
+
+    def _leaky() -> None:
+        with playwright_utils.chromium_page():
+            pass
+
+    for target, name in ((_well_behaved, "ok"), (_leaky, "vazou")):
+        thread = threading.Thread(target=target, name=name)
+        thread.start()
+        thread.join()
+
+    playwright_utils.get_shared_browser()
+    assert [name for name, _ in playwright_utils._open_states.values()] == [
+        "vazou",
+        threading.current_thread().name,
+    ]
+    leaked_state = next(iter(playwright_utils._open_states.values()))[1]
+    lock_handle = leaked_state.profile_slots[0].lock_handle
+
+    playwright_utils._close_shared_browsers_at_exit()
+
+    assert playwright_utils._open_states == {}
+    assert manager.started[2].stopped
+    assert lock_handle.closed
+    assert "'vazou'" in capsys.readouterr().err
+
+
+def test_chromium_page_reuses_persistent_profile(monkeypatch, tmp_path) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    monkeypatch.setattr(playwright_utils, "CHROMIUM_PROFILE_ROOT", str(tmp_path))
+    playwright_utils.close_shared_browser()
+
+    try:
+        with playwright_utils.chromium_page() as first_page:
+            pass
+        with playwright_utils.chromium_page():
+            pass
+
+        persistent = manager.started[0].chromium.persistent
+        assert len(persistent) == 1
+        user_data_dir, context = persistent[0]
+        assert user_data_dir == str(tmp_path / "profile-0")
+        assert len(context.pages) == 2
+        assert first_page.closed
+        assert not context.closed
+
+        other: list[str] = []
+
+        def _worker() -> None:
+            with playwright_utils.chromium_page():
+                pass
+            other.append(manager.started[-1].chromium.persistent[0][0])
+            playwright_utils.close_shared_browser()
+
+        thread = threading.Thread(target=_worker)
+        thread.start()
+        thread.join()
+
+        assert other == [str(tmp_path / "profile-1")]
+    finally:
+        playwright_utils.close_shared_browser()
+
+    assert manager.started[0].chromium.persistent[0][1].closed
+
+
+def test_chromium_page_blocks_configured_resource_types(monkeypatch) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    playwright_utils.close_shared_browser()
+
+    try:
+        with playwright_utils.chromium_page(
+            use_persistent=False,
+            block_resources={"font"},
+        ):
+            pass
+        with playwright_utils.chromium_page(
+            use_persistent=False,
+            block_resources=None,
+        ):
+            pass
+
+        contexts = manager.started[0].chromium.launched[0].contexts
+        sent = contexts[0].cdp_sessions[0].sent
+        assert sent[0] == ("Network.enable", None)
+        assert sent[1][0] == "Network.setBlockedURLs"
+        assert "*.woff2" in sent[1][1]["urls"]
+        assert "*.png" not in sent[1][1]["urls"]
+        assert contexts[1].cdp_sessions == []
+
+        with playwright_utils.chromium_page(
+            use_persistent=False,
+            block_resources={"tracker"},
+        ):
+            pass
+        sent = contexts[2].cdp_sessions[0].sent
+        assert "*googletagmanager.com*" in sent[1][1]["urls"]
+    finally:
+        playwright_utils.close_shared_browser()
+
+
+def test_chromium_page_connects_to_cdp_browser_when_configured(
+    monkeypatch, tmp_path
+) -> None:
+    manager = _FakeManager()
+    monkeypatch.setattr(playwright_utils, "sync_playwright", manager)
+    monkeypatch.setattr(playwright_utils, "CHROMIUM_PROFILE_ROOT", str(tmp_path))
+    monkeypatch.setenv("COTACOES_CDP_URL", "http://127.0.0.1:9222")
+    playwright_utils.close_shared_browser()
+
+    try:
+        with playwright_utils.chromium_page():
+            pass
+        with playwright_utils.chromium_page():
+            pass
+
+        chromium = manager.started[0].chromium
+        assert chromium.launched == []
+        assert chromium.persistent == []
+        assert len(chromium.connected) == 1
+        endpoint, browser = chromium.connected[0]
+        assert endpoint == "http://127.0.0.1:9222"
+        assert len(browser.contexts) == 2
+        assert all(context.closed for context in browser.contexts)
+    finally:
+        playwright_utils.close_shared_browser()
+
+    assert browser.closed
+
+
+def test_retry_on_timeout_retries_with_exponential_backoff(monkeypatch) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr(playwright_utils.time, "sleep", sleeps.append)
+    attempts: list[int] = []
+
+    def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("timeout") from PlaywrightTimeoutError("lento")
+        return "ok"
+
+    assert playwright_utils.retry_on_timeout(flaky, retry_count=2) == "ok"
+    assert sleeps == [1.0, 2.0]
+
+
+def test_retry_on_timeout_does_not_retry_other_errors(monkeypatch) -> None:
+    monkeypatch.setattr(playwright_utils.time, "sleep", lambda _s: None)
+    attempts: list[int] = []
+
+    def broken() -> str:
+        attempts.append(1)
+        raise ValueError("estrutura alterada")
+
+    with pytest.raises(ValueError):
+        playwright_utils.retry_on_timeout(broken, retry_count=2)
+    assert len(attempts) == 1
+
+
+def test_remaining_timeout_ms_caps_by_deadline(monkeypatch) -> None:
+    monkeypatch.setattr(playwright_utils.time, "monotonic", lambda: 100.0)
+
+    assert playwright_utils.remaining_timeout_ms(102.0, 5000) == 2000
+    assert playwright_utils.remaining_timeout_ms(110.0, 5000) == 5000
+    with pytest.raises(PlaywrightTimeoutError):
+        playwright_utils.remaining_timeout_ms(99.0, 5000)
+
+
+def test_resolve_overall_timeout_ms_maps_deprecated_timeout() -> None:
+    assert playwright_utils.resolve_overall_timeout_ms(None, 20000) == 20000
+    with pytest.deprecated_call():
+        assert playwright_utils.resolve_overall_timeout_ms(30000, 20000) == 30000
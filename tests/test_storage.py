@@ -2,20 +2,34 @@ from datetime import date, datetime, timezone
 from decimal import Decimal
 from pathlib import Path
 import csv
+import os
+import re
+from zipfile import ZipFile
 
 from openpyxl import Workbook, load_workbook
+from openpyxl.styles import PatternFill
+import pytest
+
+from cotacoes_moedas import storage
 
 from cotacoes_moedas.bcb_ptax import PtaxQuote
 from cotacoes_moedas.investing import Quote
 from cotacoes_moedas.valor_globo import BidAskQuote
 from cotacoes_moedas.storage import (
+    normalize_xlsx_layout,
     update_csv_from_xlsx,
     update_xlsx_log,
     update_xlsx_quotes_and_log,
     update_xlsx_usd_brl,
+    xlsx_session,
 )
 
 
+@pytest.fixture(autouse=True)
+def _isolated_csv_index(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(storage, "CSV_INDEX_DIR", str(tmp_path / "csv_index"))
+
+
 def _close_workbook(workbook) -> None:
     close = getattr(workbook, "close", None)
     if callable(close):
@@ -291,6 +305,21 @@ def test_update_xlsx_quotes_and_log_repeats_last_interest_values(tmp_path: Path)
     _close_workbook(workbook)
 
 
+def test_repeat_previous_value_skips_blank_and_undated_rows() -> None:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["A3"] = date(2026, 1, 20)
+    sheet["L3"] = Decimal("0.0919")
+    sheet["A4"] = "sem data"
+    sheet["L4"] = Decimal("0.5")
+    sheet["A5"] = date(2026, 1, 21)
+    sheet["A6"] = date(2026, 1, 22)
+
+    assert storage._repeat_previous_value_if_blank(sheet, 6, 12)
+    assert sheet["L6"].value == Decimal("0.0919")
+    assert not storage._repeat_previous_value_if_blank(sheet, 3, 13)
+
+
 def test_update_xlsx_quotes_and_log_uses_expected_interest_formats(
     tmp_path: Path,
 ) -> None:
@@ -316,7 +345,7 @@ def test_update_xlsx_quotes_and_log_uses_expected_interest_formats(
     _close_workbook(workbook)
 
 
-def test_update_xlsx_log_normalizes_legacy_interest_formats(tmp_path: Path) -> None:
+def test_normalize_xlsx_layout_fixes_legacy_interest_formats(tmp_path: Path) -> None:
     xlsx_path = tmp_path / "cotacoes.xlsx"
     _make_workbook(xlsx_path)
 
@@ -333,7 +362,7 @@ def test_update_xlsx_log_normalizes_legacy_interest_formats(tmp_path: Path) -> N
     workbook.save(xlsx_path)
     _close_workbook(workbook)
 
-    update_xlsx_log(xlsx_path, target_date=date(2026, 2, 12))
+    normalize_xlsx_layout(xlsx_path)
 
     workbook = load_workbook(xlsx_path)
     sheet = workbook.active
@@ -342,3 +371,255 @@ def test_update_xlsx_log_normalizes_legacy_interest_formats(tmp_path: Path) -> N
     assert sheet["M3"].number_format == "0.00%"
     assert sheet["N3"].number_format == "0.0000000000"
     _close_workbook(workbook)
+
+
+def test_update_xlsx_log_reuses_date_row_and_appends_after_last(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["A3"] = date(2026, 1, 21)
+    sheet["A4"] = "22/01/2026"
+    sheet["A6"] = date(2026, 1, 23)
+    workbook.save(xlsx_path)
+    _close_workbook(workbook)
+
+    logged_at = datetime(2026, 1, 26, 9, 0, 0)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 22), logged_at=logged_at)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 26), logged_at=logged_at)
+
+    workbook = load_workbook(xlsx_path)
+    sheet = workbook.active
+    assert sheet["O4"].value == "OK 26/01/2026 09:00:00"
+    assert sheet["A7"].value.date() == date(2026, 1, 26)
+    assert sheet["O7"].value == "OK 26/01/2026 09:00:00"
+    _close_workbook(workbook)
+
+
+def test_xlsx_session_groups_updates_in_one_save(tmp_path: Path, monkeypatch) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    _make_workbook(xlsx_path)
+    saves: list[Path] = []
+    original_save = storage._save_workbook
+
+    def _counting_save(workbook, target: Path) -> None:
+        saves.append(Path(target))
+        original_save(workbook, target)
+
+    monkeypatch.setattr(storage, "_save_workbook", _counting_save)
+
+    target_date = date(2026, 1, 23)
+    quote = Quote(
+        symbol="USD/BRL",
+        value=Decimal("5.1234"),
+        value_raw="5,1234",
+        collected_at=datetime(2026, 1, 23, 10, 0, tzinfo=timezone.utc),
+    )
+    with xlsx_session(xlsx_path) as sheet:
+        update_xlsx_usd_brl(sheet, quote, target_date=target_date)
+        update_xlsx_log(sheet, target_date=target_date, logged_at=datetime(2026, 1, 23, 9, 0))
+
+    assert saves == [xlsx_path]
+    workbook = load_workbook(xlsx_path)
+    sheet = workbook.active
+    assert sheet["B3"].value == 5.1234
+    assert sheet["C3"].value == 5.1254
+    assert sheet["O3"].value == "OK 23/01/2026 09:00:00"
+    _close_workbook(workbook)
+
+
+def test_update_csv_from_xlsx_patches_indexed_row_in_place(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    csv_path = tmp_path / "cotacoes.csv"
+    _make_workbook(xlsx_path)
+
+    logged_at = datetime(2026, 1, 23, 9, 0, 0)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 22), logged_at=logged_at)
+    update_csv_from_xlsx(xlsx_path, csv_path)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 23), logged_at=logged_at)
+    update_csv_from_xlsx(xlsx_path, csv_path)
+
+    rewrites: list[Path] = []
+    original_open = Path.open
+
+    def _tracking_open(self, mode="r", *args, **kwargs):
+        if self.name.startswith(csv_path.name) and mode == "wb":
+            rewrites.append(self)
+        return original_open(self, mode, *args, **kwargs)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(Path, "open", _tracking_open)
+        update_xlsx_log(
+            xlsx_path,
+            target_date=date(2026, 1, 23),
+            logged_at=datetime(2026, 1, 23, 9, 30, 0),
+        )
+        update_csv_from_xlsx(xlsx_path, csv_path)
+
+    assert rewrites == []
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        rows = list(csv.reader(handle, delimiter=";"))
+    assert [row[0] for row in rows[1:]] == ["22/01/2026", "23/01/2026"]
+    assert rows[2][14] == "OK 23/01/2026 09:30:00"
+
+    # CSV alterado por fora: o indice deixa de valer e o arquivo e regravado.
+    with csv_path.open("a", encoding="utf-8", newline="") as handle:
+        handle.write("24/01/2026;;;;;;;;;;;;;;\r\n")
+    update_csv_from_xlsx(xlsx_path, csv_path)
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        rows = list(csv.reader(handle, delimiter=";"))
+    assert [row[0] for row in rows[1:]] == ["22/01/2026", "23/01/2026", "24/01/2026"]
+
+
+def test_update_xlsx_quotes_and_log_rewrites_text_date(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["A3"] = "22/01/2026"
+    sheet["A4"] = date(2026, 1, 23)
+    workbook.save(xlsx_path)
+    _close_workbook(workbook)
+
+    logged_at = datetime(2026, 1, 23, 9, 0, 0)
+    update_xlsx_quotes_and_log(xlsx_path, target_date=date(2026, 1, 22), logged_at=logged_at)
+    update_xlsx_quotes_and_log(xlsx_path, target_date=date(2026, 1, 23), logged_at=logged_at)
+
+    workbook = load_workbook(xlsx_path)
+    sheet = workbook.active
+    assert sheet["A3"].value == datetime(2026, 1, 22)
+    assert sheet["A4"].value == datetime(2026, 1, 23)
+    assert sheet["O3"].value == "OK 23/01/2026 09:00:00"
+    assert sheet.max_row == 4
+    _close_workbook(workbook)
+
+
+def test_sequential_updates_reuse_workbook_until_file_changes(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    _make_workbook(xlsx_path)
+    loads: list[Path] = []
+    original_load = storage.load_workbook
+
+    def _counting_load(filename, *args, **kwargs):
+        loads.append(Path(filename))
+        return original_load(filename, *args, **kwargs)
+
+    monkeypatch.setattr(storage, "load_workbook", _counting_load)
+
+    logged_at = datetime(2026, 1, 23, 9, 0, 0)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 22), logged_at=logged_at)
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 23), logged_at=logged_at)
+    assert len(loads) == 1
+
+    workbook = original_load(xlsx_path)
+    workbook.active["O3"] = "editado"
+    workbook.save(xlsx_path)
+    _close_workbook(workbook)
+
+    update_xlsx_log(xlsx_path, target_date=date(2026, 1, 24), logged_at=logged_at)
+    assert len(loads) == 2
+
+    workbook = original_load(xlsx_path)
+    sheet = workbook.active
+    assert sheet["O3"].value == "editado"
+    assert sheet["O4"].value == "OK 23/01/2026 09:00:00"
+    assert sheet["O5"].value == "OK 23/01/2026 09:00:00"
+    _close_workbook(workbook)
+
+
+def test_cached_workbook_dropped_when_file_replaced_with_same_size_and_mtime(
+    tmp_path: Path,
+) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    _make_workbook(xlsx_path)
+    update_xlsx_log(
+        xlsx_path,
+        target_date=date(2026, 1, 22),
+        logged_at=datetime(2026, 1, 23, 9, 0, 0),
+    )
+
+    # Troca o conteudo sem mudar tamanho nem mtime (como um `copy2` da rede).
+    stat = xlsx_path.stat()
+    data = bytearray(xlsx_path.read_bytes())
+    data[-1] ^= 0xFF
+    with xlsx_path.open("r+b") as handle:
+        handle.write(data)
+    os.utime(xlsx_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert xlsx_path.stat().st_size == stat.st_size
+
+    assert storage._take_cached_workbook(xlsx_path) is None
+
+
+def test_update_csv_from_xlsx_keeps_latin1_rows(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    csv_path = tmp_path / "cotacoes.csv"
+    _make_workbook(xlsx_path)
+    csv_path.write_bytes(
+        "Data;Situação\r\n22/01/2026;;;;;;;;;;;;;;ERRO sessão expirada\r\n".encode("latin-1")
+    )
+
+    update_xlsx_log(
+        xlsx_path,
+        target_date=date(2026, 1, 23),
+        logged_at=datetime(2026, 1, 23, 9, 0, 0),
+    )
+    update_csv_from_xlsx(xlsx_path, csv_path)
+
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        rows = list(csv.reader(handle, delimiter=";"))
+    assert rows[1][14] == "ERRO sessão expirada"
+    assert rows[2][0] == "23/01/2026"
+
+
+def test_update_csv_from_xlsx_ignores_stale_sheet_dimension(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    csv_path = tmp_path / "cotacoes.csv"
+    _make_workbook(xlsx_path)
+    update_xlsx_log(
+        xlsx_path,
+        target_date=date(2026, 1, 23),
+        logged_at=datetime(2026, 1, 23, 9, 0, 0),
+    )
+
+    # Simula planilha gravada por outra ferramenta com <dimension ref="A1:A1"/>.
+    stale_path = tmp_path / "stale.xlsx"
+    with ZipFile(xlsx_path) as source, ZipFile(stale_path, "w") as target:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1:A1"', data)
+            target.writestr(item, data)
+
+    update_csv_from_xlsx(stale_path, csv_path)
+
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        rows = list(csv.reader(handle, delimiter=";"))
+    assert rows[-1][0] == "23/01/2026"
+
+
+def test_normalize_xlsx_layout_restyles_only_rows_that_drifted(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "cotacoes.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    for offset in range(4):
+        sheet.cell(row=3 + offset, column=1, value=date(2026, 1, 20 + offset))
+    workbook.save(xlsx_path)
+    _close_workbook(workbook)
+    normalize_xlsx_layout(xlsx_path)
+
+    workbook = load_workbook(xlsx_path)
+    sheet = workbook.active
+    expected_fill = sheet["E4"].fill.fgColor.rgb
+    sheet["E4"].fill = PatternFill(fill_type="solid", fgColor="FF0000")
+    workbook.save(xlsx_path)
+    _close_workbook(workbook)
+
+    normalize_xlsx_layout(xlsx_path)
+
+    workbook = load_workbook(xlsx_path)
+    sheet = workbook.active
+    assert sheet["E4"].fill.fgColor.rgb == expected_fill
+    assert sheet["E3"].fill.fgColor.rgb != expected_fill
+    assert sheet["E6"].fill.fgColor.rgb == expected_fill
+    _close_workbook(workbook)
@@ -0,0 +1,265 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from email.message import Message
+import threading
+import time
+from urllib.error import HTTPError
+
+import pytest
+
+from cotacoes_moedas import valor_globo
+from cotacoes_moedas.valor_globo import BidAskQuote
+
+
+_VALOR_HTML = """
+<table>
+  <tr><th>Moeda</th><th>Compra</th><th>Venda</th></tr>
+  <tr><td>D&oacute;lar Comercial</td><td>5,2849</td><td>5,2855</td></tr>
+  <tr><td>D&oacute;lar Turismo</td><td>5,4120</td><td>5,5930</td></tr>
+</table>
+"""
+
+
+def test_fetch_dolar_turismo_reads_served_html_without_browser(monkeypatch) -> None:
+    monkeypatch.setattr(valor_globo, "_fetch_valor_html", lambda _timeout: _VALOR_HTML)
+
+    def _fail_browser(*_args):
+        raise AssertionError("nao deveria abrir o navegador")
+
+    monkeypatch.setattr(valor_globo, "_read_turismo_browser", _fail_browser)
+
+    quote = valor_globo.fetch_dolar_turismo()
+
+    assert quote.buy == Decimal("5.4120")
+    assert quote.sell == Decimal("5.5930")
+    assert quote.buy_raw == "5,4120"
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "<table><tr><td>Dolar Comercial</td><td>5,28</td><td>5,29</td></tr></table>",
+        "<table><tr><td>Dolar Turismo</td><td>-</td><td>-</td></tr></table>",
+        "<table><tr><td>Veja</td><td>Dolar Turismo sobe</td><td>1,0</td></tr></table>",
+    ],
+)
+def test_fetch_dolar_turismo_falls_back_to_browser(monkeypatch, html: str) -> None:
+    monkeypatch.setattr(valor_globo, "_fetch_valor_html", lambda _timeout: html)
+    calls: list[int] = []
+
+    def _browser(_headless: bool, timeout_ms: int) -> tuple[str, str]:
+        calls.append(timeout_ms)
+        return "5,4120", "5,5930"
+
+    monkeypatch.setattr(valor_globo, "_read_turismo_browser", _browser)
+
+    quote = valor_globo.fetch_dolar_turismo(timeout_ms=1000)
+
+    assert calls == [1000]
+    assert quote.sell == Decimal("5.5930")
+
+
+def test_fetch_dolar_turismo_falls_back_when_http_fails(monkeypatch) -> None:
+    def _offline(_timeout: float) -> str:
+        raise OSError("sem rede")
+
+    monkeypatch.setattr(valor_globo, "_fetch_valor_html", _offline)
+    monkeypatch.setattr(
+        valor_globo, "_read_turismo_browser", lambda *_args: ("5,4120", "5,5930")
+    )
+
+    assert valor_globo.fetch_dolar_turismo().buy == Decimal("5.4120")
+
+
+def _quote(buy: str, collected_at: datetime) -> BidAskQuote:
+    return BidAskQuote(
+        symbol="USD/BRL Turismo",
+        buy=Decimal(buy),
+        sell=Decimal(buy),
+        buy_raw=buy,
+        sell_raw=buy,
+        collected_at=collected_at,
+    )
+
+
+@pytest.fixture
+def _empty_turismo_cache(monkeypatch):
+    monkeypatch.setattr(valor_globo, "_cached_quote", None)
+    monkeypatch.setattr(valor_globo, "_refresh_future", None)
+
+
+@pytest.mark.usefixtures("_empty_turismo_cache")
+def test_fetch_dolar_turismo_cached_serves_fresh_and_refreshes_stale(monkeypatch) -> None:
+    now = datetime.now(timezone.utc)
+    calls: list[str] = []
+    closed: list[str] = []
+    results = iter(["5.40", "5.41", "5.42"])
+
+    def _fetch(**_kwargs) -> BidAskQuote:
+        calls.append(threading.current_thread().name)
+        return _quote(next(results), now)
+
+    monkeypatch.setattr(valor_globo, "fetch_dolar_turismo", _fetch)
+    monkeypatch.setattr(
+        valor_globo,
+        "close_shared_browser",
+        lambda: closed.append(threading.current_thread().name),
+    )
+
+    first = valor_globo.fetch_dolar_turismo_cached()
+    assert valor_globo.fetch_dolar_turismo_cached() is first
+    assert len(calls) == 1
+
+    # Velha, mas dentro da janela: devolve a mesma e atualiza em segundo plano.
+    monkeypatch.setattr(
+        valor_globo, "_cached_quote", _quote("5.40", now - timedelta(seconds=60))
+    )
+    stale = valor_globo.fetch_dolar_turismo_cached()
+    assert stale.buy == Decimal("5.40")
+    valor_globo._refresh_future.result(timeout=5)
+    assert all(name.startswith("turismo-refresh") for name in calls)
+    assert closed == calls
+    assert valor_globo.fetch_dolar_turismo_cached().buy == Decimal("5.41")
+
+    # Vencida: busca de novo e espera.
+    monkeypatch.setattr(
+        valor_globo, "_cached_quote", _quote("5.41", now - timedelta(seconds=600))
+    )
+    assert valor_globo.fetch_dolar_turismo_cached().buy == Decimal("5.42")
+    assert len(calls) == 3
+
+
+@pytest.mark.usefixtures("_empty_turismo_cache")
+def test_fetch_dolar_turismo_cached_runs_one_fetch_for_concurrent_cold_calls(
+    monkeypatch,
+) -> None:
+    now = datetime.now(timezone.utc)
+    calls: list[int] = []
+    release = threading.Event()
+
+    def _fetch(**_kwargs) -> BidAskQuote:
+        calls.append(1)
+        release.wait(5)
+        return _quote("5.40", now)
+
+    monkeypatch.setattr(valor_globo, "fetch_dolar_turismo", _fetch)
+    monkeypatch.setattr(valor_globo, "close_shared_browser", lambda: None)
+
+    results: list[BidAskQuote] = []
+    callers = [
+        threading.Thread(
+            target=lambda: results.append(valor_globo.fetch_dolar_turismo_cached())
+        )
+        for _ in range(5)
+    ]
+    for caller in callers:
+        caller.start()
+    while valor_globo._refresh_future is None:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for caller in callers:
+        caller.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
+
+
+@pytest.mark.usefixtures("_empty_turismo_cache")
+def test_fetch_dolar_turismo_cached_does_not_cache_errors(monkeypatch) -> None:
+    def _fail(**_kwargs) -> BidAskQuote:
+        raise valor_globo.PriceParseError("fora do ar")
+
+    monkeypatch.setattr(valor_globo, "fetch_dolar_turismo", _fail)
+
+    with pytest.raises(valor_globo.PriceParseError):
+        valor_globo.fetch_dolar_turismo_cached()
+    assert valor_globo._cached_quote is None
+
+
+class _FakeHandle:
+    def __init__(self, value: object) -> None:
+        self._value = value
+
+    def json_value(self) -> object:
+        return self._value
+
+
+class _FakeValorPage:
+    def __init__(self, cells: list[str]) -> None:
+        self.url = "https://valor.globo.com/"
+        self.cells = cells
+        self.calls: list[str] = []
+
+    def goto(self, url: str, *, wait_until: str, timeout: int) -> None:
+        self.calls.append("goto")
+
+    def wait_for_function(
+        self, script: str, *, timeout: int, polling: int | str = "raf"
+    ) -> _FakeHandle:
+        self.calls.append("wait_for_function")
+        self.polling = polling
+        return _FakeHandle(self.cells)
+
+
+def _patch_page(monkeypatch, page: _FakeValorPage) -> None:
+    @contextmanager
+    def _chromium_page(**_kwargs):
+        yield page
+
+    monkeypatch.setattr(valor_globo, "chromium_page", _chromium_page)
+
+
+def test_read_turismo_browser_reads_row_in_one_evaluate(monkeypatch) -> None:
+    page = _FakeValorPage(["Dolar Turismo", "5,4120", "5,5930", "+0,1%"])
+    _patch_page(monkeypatch, page)
+
+    assert valor_globo._read_turismo_browser(True, 1000) == ("5,4120", "5,5930")
+    assert page.calls == ["goto", "wait_for_function"]
+    assert page.polling == valor_globo._ROW_POLLING_MS
+
+
+def test_read_turismo_browser_rejects_incomplete_row(monkeypatch) -> None:
+    _patch_page(monkeypatch, _FakeValorPage(["Dolar Turismo", "5,4120"]))
+
+    with pytest.raises(valor_globo.PriceParseError, match="incompleta"):
+        valor_globo._read_turismo_browser(True, 1000)
+
+
+class _FakeResponse:
+    def __init__(self, body: str, headers: dict[str, str]) -> None:
+        self._body = body.encode("utf-8")
+        self.headers = Message()
+        for name, value in headers.items():
+            self.headers[name] = value
+
+    def __enter__(self) -> "_FakeResponse":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        return None
+
+    def read(self) -> bytes:
+        return self._body
+
+
+def test_fetch_valor_html_reuses_page_on_not_modified(monkeypatch) -> None:
+    monkeypatch.setattr(valor_globo, "_last_valor_page", None)
+    sent: list[str | None] = []
+
+    def _urlopen(request, timeout: float):
+        sent.append(request.get_header("If-none-match"))
+        if len(sent) == 1:
+            return _FakeResponse(
+                _VALOR_HTML,
+                {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'},
+            )
+        raise HTTPError(request.full_url, 304, "Not Modified", Message(), None)
+
+    monkeypatch.setattr(valor_globo, "urlopen", _urlopen)
+
+    assert valor_globo._fetch_valor_html(1.0) == _VALOR_HTML
+    assert valor_globo._fetch_valor_html(1.0) == _VALOR_HTML
+    assert sent == [None, '"v1"']